@@ -6,7 +6,7 @@ import logging
 from pathlib import Path
 from typing import List, Dict, Any, Optional
 
-from src.retrieval.vector_store import VectorStore
+from src.retrieval.vector_store import VectorStore, get_default_store
 from src.retrieval.rag_retriever import RAGRetriever
 from src.llm_orchestration.answer_engine import AnswerEngine
 from src.llm_orchestration.answer_cache import AnswerCache, CachedAnswer
@@ -795,7 +795,7 @@ def initialize_system():
         logger.info("Initializing system...")
 
         # Initialize vector store
-        vector_store = VectorStore()
+        vector_store = get_default_store()
 
         # Initialize retriever
         retriever = RAGRetriever(vector_store)
@@ -960,20 +960,22 @@ def display_sidebar(vector_store: VectorStore):
         }
 
 
-def display_answer(answer: Any):
+def display_answer(answer: Any, text_shown: bool = False):
     """
     Display answer with evidence and sources.
 
     Args:
         answer: Answer object from answer engine
+        text_shown: The answer text was already streamed to the page
     """
     if not answer.has_evidence:
         st.warning(answer.answer)
         return
 
     # Display answer
-    st.markdown("### Answer")
-    st.markdown(answer.answer)
+    if not text_shown:
+        st.markdown("### Answer")
+        st.markdown(answer.answer)
 
     # Display retrieval stats
     with st.expander("Retrieval Statistics"):
@@ -1083,7 +1085,7 @@ def main():
 
                 # Convert cached answer to Answer object format
                 from src.llm_orchestration.answer_engine import Answer
-                answer = Answer(
+                answer = Answer.from_formatted(
                     question=cached_answer.question,
                     answer=cached_answer.answer,
                     evidence=cached_answer.evidence,
@@ -1102,33 +1104,42 @@ def main():
                 })
             else:
                 # Generate new answer using LLM
-                with st.spinner('Searching papers and generating answer...'):
-                    try:
-                        # Choose reasoning mode
-                        if filters['enable_multi_hop']:
+                try:
+                    # Choose reasoning mode
+                    if filters['enable_multi_hop']:
+                        with st.spinner('Searching papers and generating answer...'):
                             answer = answer_engine.multi_hop_reasoning(
                                 question=question
                             )
-                        else:
-                            answer = answer_engine.answer_question(
+
+                        # Display answer
+                        display_answer(answer)
+                    else:
+                        with st.spinner('Searching papers...'):
+                            streaming = answer_engine.answer_question(
                                 question=question,
                                 top_k=filters['top_k'],
                                 filter_papers=filters['selected_papers'],
-                                filter_region_types=filters['selected_region_types']
+                                filter_region_types=filters['selected_region_types'],
+                                stream=True
                             )
-
-                        # Display answer
-                        display_answer(answer)
-
-                        # Add to chat history
-                        st.session_state.messages.append({
-                            'role': 'assistant',
-                            'answer': answer
-                        })
-
-                    except Exception as e:
-                        logger.error(f"Error generating answer: {e}")
-                        st.error(f"Failed to generate answer: {e}")
+                        answer = streaming.answer
+
+                        # Display answer, streaming the text as it is generated
+                        if answer.has_evidence:
+                            st.markdown("### Answer")
+                            st.write_stream(streaming)
+                        display_answer(answer, text_shown=answer.has_evidence)
+
+                    # Add to chat history
+                    st.session_state.messages.append({
+                        'role': 'assistant',
+                        'answer': answer
+                    })
+
+                except Exception as e:
+                    logger.error(f"Error generating answer: {e}")
+                    st.error(f"Failed to generate answer: {e}")
 
     # Clear chat button
     if st.session_state.messages:
@@ -2,6 +2,7 @@
 Script to populate answer cache with all suggested questions.
 Run this after indexing documents to pre-compute answers for instant responses.
 """
+import asyncio
 import logging
 import sys
 from pathlib import Path
@@ -97,11 +98,11 @@ def main():
 
         # Populate cache
         logger.info(f"Processing {len(SUGGESTED_QUESTIONS)} suggested questions...")
-        answer_cache.update_all(
+        asyncio.run(answer_cache.update_all_async(
             questions=SUGGESTED_QUESTIONS,
             answer_engine=answer_engine,
             top_k=10
-        )
+        ))
 
         # Show final stats
         final_stats = answer_cache.get_stats()
@@ -194,8 +194,15 @@ def main():
         action='store_true',
         help="Clear existing vector store before processing"
     )
+    parser.add_argument(
+        '--page-batch-size',
+        type=int,
+        default=config.PAGE_BATCH_SIZE,
+        help="Pages rendered and sent through layout detection per batch"
+    )
 
     args = parser.parse_args()
+    config.PAGE_BATCH_SIZE = args.page_batch_size
 
     # Validate data directory
     if not args.data_dir.exists():
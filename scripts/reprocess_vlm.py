@@ -3,11 +3,16 @@ Reprocess VLM extractions for existing documents.
 This script re-extracts tables and figures using the improved VLM prompts.
 """
 import logging
+import tempfile
+from functools import lru_cache
 from pathlib import Path
+from typing import Callable, List, Optional
+
+import numpy as np
+from PIL import Image
 from tqdm import tqdm
-import json
 
-from src.document_processing.document_processor import DocumentProcessor, NumpyEncoder
+from src.document_processing.document_processor import DocumentProcessor
 from src.document_processing.vlm_extractor import VLMExtractor
 from src.config import config
 from pdf2image import convert_from_path
@@ -20,6 +25,29 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+def make_page_getter(page_paths: List[str]) -> Callable[[int], Optional[np.ndarray]]:
+    """
+    Build a get_page(page_num) callable over rendered page files.
+
+    Pages are decoded on demand and only the most recently used few are
+    kept, so memory does not grow with the length of the document.
+
+    Args:
+        page_paths: Rendered page files in page order
+
+    Returns:
+        Callable returning the page as an array, or None if out of range
+    """
+    @lru_cache(maxsize=8)
+    def get_page(page_num: int) -> Optional[np.ndarray]:
+        if not 1 <= page_num <= len(page_paths):
+            return None
+        with Image.open(page_paths[page_num - 1]) as image:
+            return np.asarray(image)
+
+    return get_page
+
+
 def reprocess_vlm_extractions(
     processed_dir: Path = config.PROCESSED_DATA_DIR,
     pdf_dir: Path = config.DATA_DIR,
@@ -64,8 +92,7 @@ def reprocess_vlm_extractions(
             logger.info(f"\nProcessing: {json_file.name}")
 
             # Load processed document
-            with open(json_file, 'r', encoding='utf-8') as f:
-                document = json.load(f)
+            document = document_processor.load_processed_document(json_file)
 
             # Find corresponding PDF
             pdf_name = document['filename']
@@ -76,17 +103,6 @@ def reprocess_vlm_extractions(
                 failed += 1
                 continue
 
-            # Convert PDF to images using document processor
-            logger.info("Converting PDF to images...")
-            try:
-                images_list = convert_from_path(str(pdf_path), dpi=200)
-                images = {i + 1: img for i, img in enumerate(images_list)}
-            except FileNotFoundError as e:
-                logger.error(f"pdftoppm not found. Install poppler: brew install poppler")
-                logger.error(f"Skipping VLM reprocessing for {pdf_name}")
-                failed += 1
-                continue
-
             # Find table and figure regions
             table_figure_regions = []
             for page in document['pages']:
@@ -101,9 +117,28 @@ def reprocess_vlm_extractions(
                 successful += 1
                 continue
 
-            # Extract with VLM
-            logger.info("Running VLM extraction...")
-            vlm_extractions = vlm_extractor.process_regions(table_figure_regions, images)
+            # Render pages to files (at the resolution the bboxes were
+            # detected at) and decode them only when a region needs one
+            logger.info("Converting PDF to images...")
+            with tempfile.TemporaryDirectory(prefix='render-', dir=config.RENDER_DIR) as render_dir:
+                try:
+                    page_paths = convert_from_path(
+                        str(pdf_path),
+                        dpi=config.PDF_DPI,
+                        output_folder=render_dir,
+                        paths_only=True
+                    )
+                except FileNotFoundError as e:
+                    logger.error(f"pdftoppm not found. Install poppler: brew install poppler")
+                    logger.error(f"Skipping VLM reprocessing for {pdf_name}")
+                    failed += 1
+                    continue
+
+                # Extract with VLM
+                logger.info("Running VLM extraction...")
+                vlm_extractions = vlm_extractor.process_regions(
+                    table_figure_regions, make_page_getter(page_paths)
+                )
 
             # Count successful extractions
             for region_id, extraction in vlm_extractions.items():
@@ -121,18 +156,11 @@ def reprocess_vlm_extractions(
             document['vlm_extractions'] = vlm_extractions
 
             # Save updated document
-            with open(json_file, 'w', encoding='utf-8') as f:
-                json.dump(document, f, indent=2, ensure_ascii=False, cls=NumpyEncoder)
+            document_processor.save_processed_document(document, json_file.parent)
 
             logger.info(f"✓ Successfully reprocessed {json_file.name}")
             successful += 1
 
-            # Clean up images
-            del images
-            del images_list
-            import gc
-            gc.collect()
-
         except Exception as e:
             failed += 1
             logger.error(f"✗ Failed to process {json_file.name}: {e}", exc_info=True)
@@ -1,12 +1,16 @@
 """
 Test script to verify installation and system setup.
 """
+import logging
 import sys
 from pathlib import Path
 
 # Add parent directory to path
 sys.path.append(str(Path(__file__).parent.parent))
 
+logger = logging.getLogger(__name__)
+
+
 def test_imports():
     """Test that all required packages can be imported."""
     print("Testing package imports...")
@@ -36,6 +40,14 @@ def test_imports():
             print(f"✗ {name}: {e}")
             failed.append(name)
 
+    try:
+        import PIL
+        # Pillow-SIMD releases carry a .postN suffix
+        build = "Pillow-SIMD" if ".post" in PIL.__version__ else "stock Pillow"
+        print(f"  - Pillow {PIL.__version__} ({build})")
+    except ImportError:
+        pass
+
     if failed:
         print(f"\n❌ Failed to import: {', '.join(failed)}")
         return False
@@ -143,8 +155,7 @@ def test_components():
 
     except Exception as e:
         print(f"✗ Component initialization error: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Component init failed")
         return False
 
 
@@ -2,6 +2,8 @@
 Configuration management for the document understanding system.
 """
 import os
+import shutil
+import tempfile
 from pathlib import Path
 from dotenv import load_dotenv
 from pydantic import BaseModel, Field
@@ -20,6 +22,29 @@ except (ImportError, FileNotFoundError, KeyError):
     # Not running on Streamlit Cloud or secrets not configured
     pass
 
+# Directories already created by this process
+_created_dirs = set()
+
+
+def _ensure_dir(path: Path):
+    """Create a directory once per process."""
+    if path in _created_dirs:
+        return
+    path.mkdir(parents=True, exist_ok=True)
+    _created_dirs.add(path)
+
+
+def _default_render_dir() -> Path:
+    """Prefer RAM-backed /dev/shm for rendered pages when it has room."""
+    shm = Path("/dev/shm")
+    try:
+        if shm.is_dir() and shutil.disk_usage(shm).free >= 1 << 30:
+            return shm
+    except OSError:
+        pass
+    return Path(tempfile.gettempdir())
+
+
 class Config(BaseModel):
     """System configuration."""
 
@@ -31,6 +56,12 @@ class Config(BaseModel):
         default_factory=lambda: Path(os.getenv("CHROMA_PERSIST_DIR", "./chroma_db"))
     )
     LOGS_DIR: Path = Field(default_factory=lambda: Path(__file__).parent.parent / "logs")
+    CACHE_DIR: Path = Field(
+        default_factory=lambda: Path(os.getenv("CACHE_DIR", str(Path(__file__).parent.parent / ".cache")))
+    )
+    RENDER_DIR: Path = Field(
+        default_factory=lambda: Path(os.getenv("RENDER_DIR", "") or _default_render_dir())
+    )
 
     # API Configuration
     OPENROUTER_API_KEY: str = Field(default_factory=lambda: os.getenv("OPENROUTER_API_KEY", ""))
@@ -48,6 +79,27 @@ class Config(BaseModel):
     EMBEDDING_MODEL: str = Field(
         default_factory=lambda: os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-mpnet-base-v2")
     )
+    # Texts per embedding forward pass when indexing
+    EMBEDDING_BATCH_SIZE: int = Field(default_factory=lambda: int(os.getenv("EMBEDDING_BATCH_SIZE", "64")))
+    # Token limit for embedded text (0 = the model's own limit). Batches
+    # are already padded only to their longest text, so lowering this
+    # saves compute only by truncating long chunks
+    EMBEDDING_MAX_SEQ_LENGTH: int = Field(
+        default_factory=lambda: int(os.getenv("EMBEDDING_MAX_SEQ_LENGTH", "0"))
+    )
+    # Ingests at least this large are embedded by a pool of worker
+    # processes (one per GPU, or several on CPU); 0 disables the pool
+    EMBEDDING_MULTI_PROCESS_MIN: int = Field(
+        default_factory=lambda: int(os.getenv("EMBEDDING_MULTI_PROCESS_MIN", "5000"))
+    )
+    # On CUDA: run the embedding model in half precision, and optionally
+    # compile it (slow first batches while kernels are compiled)
+    EMBEDDING_FP16: bool = Field(
+        default_factory=lambda: os.getenv("EMBEDDING_FP16", "true").lower() == "true"
+    )
+    EMBEDDING_COMPILE: bool = Field(
+        default_factory=lambda: os.getenv("EMBEDDING_COMPILE", "false").lower() == "true"
+    )
 
     # Processing Configuration
     MAX_WORKERS: int = Field(default_factory=lambda: int(os.getenv("MAX_WORKERS", "4")))
@@ -55,24 +107,75 @@ class Config(BaseModel):
     CHUNK_OVERLAP: int = Field(default_factory=lambda: int(os.getenv("CHUNK_OVERLAP", "50")))
     TOP_K_RETRIEVAL: int = Field(default_factory=lambda: int(os.getenv("TOP_K_RETRIEVAL", "10")))
 
+    # In-memory cache of LLM answers for repeated question + evidence
+    LLM_CACHE_MAX_ENTRIES: int = Field(default_factory=lambda: int(os.getenv("LLM_CACHE_MAX_ENTRIES", "512")))
+    LLM_CACHE_TTL: float = Field(default_factory=lambda: float(os.getenv("LLM_CACHE_TTL", "3600")))
+    # On-disk LangChain cache of exact prompt -> completion, shared across
+    # restarts and worker processes
+    LLM_PERSISTENT_CACHE: bool = Field(
+        default_factory=lambda: os.getenv("LLM_PERSISTENT_CACHE", "true").lower() == "true"
+    )
+
+    # In-memory cache of retrieval results for near-duplicate queries
+    RETRIEVAL_CACHE_MAX_ENTRIES: int = Field(
+        default_factory=lambda: int(os.getenv("RETRIEVAL_CACHE_MAX_ENTRIES", "256"))
+    )
+    RETRIEVAL_CACHE_TTL: float = Field(default_factory=lambda: float(os.getenv("RETRIEVAL_CACHE_TTL", "600")))
+    RETRIEVAL_CACHE_THRESHOLD: float = Field(
+        default_factory=lambda: float(os.getenv("RETRIEVAL_CACHE_THRESHOLD", "0.95"))
+    )
+
+    # Pipeline Configuration
+    PDF_DPI: int = Field(default_factory=lambda: int(os.getenv("PDF_DPI", "300")))
+    PAGE_BATCH_SIZE: int = Field(default_factory=lambda: int(os.getenv("PAGE_BATCH_SIZE", "4")))
+    PIPELINE_QUEUE_SIZE: int = Field(default_factory=lambda: int(os.getenv("PIPELINE_QUEUE_SIZE", "4")))
+    VLM_BATCH_SIZE: int = Field(default_factory=lambda: int(os.getenv("VLM_BATCH_SIZE", "8")))
+    VLM_BATCH_MAX_WAIT: float = Field(default_factory=lambda: float(os.getenv("VLM_BATCH_MAX_WAIT", "2.0")))
+    VLM_MAX_CONCURRENT: int = Field(default_factory=lambda: int(os.getenv("VLM_MAX_CONCURRENT", "4")))
+    # Skip VLM calls for near-uniform crops (layout misfires on blank areas)
+    VLM_SKIP_BLANK: bool = Field(
+        default_factory=lambda: os.getenv("VLM_SKIP_BLANK", "true").lower() == "true"
+    )
+    # Provider requests-per-minute budget for VLM calls (0 = unlimited)
+    VLM_RPM: int = Field(default_factory=lambda: int(os.getenv("VLM_RPM", "60")))
+    # Longest image side uploaded to the VLM: models tile-resize to about
+    # 1568px anyway (use 1024 for smaller models) and bill tokens per tile.
+    # Tables get more room to keep small print legible.
+    VLM_MAX_SIDE: int = Field(default_factory=lambda: int(os.getenv("VLM_MAX_SIDE", "1568")))
+    VLM_TABLE_MAX_SIDE: int = Field(default_factory=lambda: int(os.getenv("VLM_TABLE_MAX_SIDE", "2048")))
+
+    USE_PROCESSING_CACHE: bool = Field(
+        default_factory=lambda: os.getenv("USE_PROCESSING_CACHE", "true").lower() == "true"
+    )
+
     # OCR Configuration
+    OCR_DPI: int = Field(default_factory=lambda: int(os.getenv("OCR_DPI", "200")))
     OCR_LANG: str = "en"
     OCR_USE_GPU: bool = True
     OCR_CONFIDENCE_THRESHOLD: float = 0.5
+    OCR_CONCURRENCY: int = Field(
+        default_factory=lambda: int(os.getenv("OCR_CONCURRENCY", str(os.cpu_count() or 1)))
+    )
 
     # Layout Detection Configuration
     LAYOUT_MODEL: str = "lp://PubLayNet/faster_rcnn_R_50_FPN_3x/config"
     LAYOUT_CONFIDENCE_THRESHOLD: float = 0.6
+    LAYOUT_ENABLE_MKLDNN: bool = Field(
+        default_factory=lambda: os.getenv("LAYOUT_ENABLE_MKLDNN", "true").lower() == "true"
+    )
+    LAYOUT_THREADS: int = Field(
+        default_factory=lambda: int(os.getenv("LAYOUT_THREADS", str(os.cpu_count() or 1)))
+    )
 
     # Region Types
     REGION_TYPES: list = ["text", "title", "list", "table", "figure"]
 
     def __init__(self, **data):
         super().__init__(**data)
-        # Create directories if they don't exist
-        self.PROCESSED_DATA_DIR.mkdir(parents=True, exist_ok=True)
-        self.CHROMA_PERSIST_DIR.mkdir(parents=True, exist_ok=True)
-        self.LOGS_DIR.mkdir(parents=True, exist_ok=True)
+        # Create directories if they don't exist (skipped if already done)
+        _ensure_dir(self.PROCESSED_DATA_DIR)
+        _ensure_dir(self.CHROMA_PERSIST_DIR)
+        _ensure_dir(self.LOGS_DIR)
 
 # Global config instance
 config = Config()
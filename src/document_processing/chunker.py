@@ -3,9 +3,10 @@ Semantic chunking with metadata enrichment for knowledge representation.
 """
 import logging
 import json
-import numpy as np
-from typing import List, Dict, Any, Optional
-from dataclasses import dataclass, asdict
+import hashlib
+import orjson
+from typing import List, Dict, Any, Optional, Tuple
+from dataclasses import dataclass
 from pathlib import Path
 
 from ..config import config
@@ -13,16 +14,55 @@ from ..config import config
 logger = logging.getLogger(__name__)
 
 
-class NumpyEncoder(json.JSONEncoder):
-    """Custom JSON encoder for numpy types."""
-    def default(self, obj):
-        if isinstance(obj, (np.integer, np.int32, np.int64)):
-            return int(obj)
-        elif isinstance(obj, (np.floating, np.float32, np.float64)):
-            return float(obj)
-        elif isinstance(obj, np.ndarray):
-            return obj.tolist()
-        return super().default(obj)
+# Natural break points, in order of preference
+_BREAK_CHARS = ('\n\n', '\n', '. ', ' ')
+
+
+def _split_spans(text: str, char_size: int, char_overlap: int) -> List[Tuple[int, int]]:
+    """
+    Compute (start, end) character spans for overlapping chunks.
+
+    Only indices are produced here so the scan over long regions never
+    allocates intermediate substrings; break-point search is delegated to
+    ``str.rfind``, which runs in C.
+
+    Args:
+        text: Text to split
+        char_size: Maximum span length in characters
+        char_overlap: Overlap between consecutive spans in characters
+
+    Returns:
+        List of (start, end) spans
+    """
+    spans = []
+    text_len = len(text)
+    rfind = text.rfind
+    # Breaks inside the overlap window would stall the scan
+    min_advance = min(char_overlap, char_size - 1) + 1
+    start = 0
+
+    while start < text_len:
+        end = start + char_size
+
+        if end < text_len:
+            # Look for paragraph, newline, sentence or word break
+            for break_char in _BREAK_CHARS:
+                break_pos = rfind(break_char, start + min_advance, end)
+                if break_pos != -1:
+                    end = break_pos + len(break_char)
+                    break
+        else:
+            end = text_len
+
+        spans.append((start, end))
+
+        if end >= text_len:
+            break
+
+        # Move start forward with overlap, always making progress
+        start = max(end - char_overlap, start + 1)
+
+    return spans
 
 
 @dataclass
@@ -84,6 +124,9 @@ class SemanticChunker:
         logger.info(f"Chunking document: {document['filename']}")
 
         chunks = []
+        # Content hash -> first chunk with that text (for boilerplate dedup)
+        seen: Dict[bytes, Chunk] = {}
+        duplicates = 0
         ordered_regions = document['ordered_regions']
         vlm_extractions = document.get('vlm_extractions', {})
         paper_name = document['filename']
@@ -126,8 +169,27 @@ class SemanticChunker:
                 reading_order=region['reading_order']
             )
 
-            chunks.extend(region_chunks)
-
+            for chunk in region_chunks:
+                key = hashlib.blake2b(chunk.text.encode('utf-8'), digest_size=8).digest()
+                canonical = seen.get(key)
+                if canonical is None:
+                    seen[key] = chunk
+                    chunks.append(chunk)
+                    continue
+
+                # Repeated header/footer/affiliation text: record where it
+                # also appears instead of emitting another chunk
+                if canonical.metadata is None:
+                    canonical.metadata = {}
+                canonical.metadata.setdefault('provenances', []).append({
+                    'region_id': chunk.region_id,
+                    'page_num': chunk.page_num,
+                    'bbox': chunk.bbox
+                })
+                duplicates += 1
+
+        if duplicates:
+            logger.info(f"Dropped {duplicates} duplicate chunks")
         logger.info(f"Created {len(chunks)} chunks from document")
         return chunks
 
@@ -177,24 +239,10 @@ class SemanticChunker:
             chunks.append(chunk)
         else:
             # Split into multiple chunks with overlap
-            char_size = self.chunk_size * 4
-            char_overlap = self.chunk_overlap * 4
+            spans = _split_spans(text, self.chunk_size * 4, self.chunk_overlap * 4)
 
-            start = 0
             chunk_index = 0
-
-            while start < len(text):
-                end = start + char_size
-
-                # Find natural break point (sentence/paragraph)
-                if end < len(text):
-                    # Look for period, newline, or space
-                    for break_char in ['\n\n', '\n', '. ', ' ']:
-                        break_pos = text.rfind(break_char, start, end)
-                        if break_pos != -1:
-                            end = break_pos + len(break_char)
-                            break
-
+            for start, end in spans:
                 chunk_text = text[start:end].strip()
 
                 if chunk_text:
@@ -212,13 +260,6 @@ class SemanticChunker:
                     chunks.append(chunk)
                     chunk_index += 1
 
-                # Move start forward with overlap
-                start = end - char_overlap if end < len(text) else end
-
-                # Prevent infinite loop
-                if start >= len(text):
-                    break
-
         return chunks
 
     def _format_vlm_extraction(self, vlm_data: Dict[str, Any]) -> str:
@@ -311,10 +352,9 @@ class SemanticChunker:
         """
         output_path.parent.mkdir(parents=True, exist_ok=True)
 
-        chunks_data = [asdict(chunk) for chunk in chunks]
-
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(chunks_data, f, indent=2, ensure_ascii=False, cls=NumpyEncoder)
+        # orjson serializes the Chunk dataclasses and numpy values natively
+        with open(output_path, 'wb') as f:
+            f.write(orjson.dumps(chunks, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_INDENT_2))
 
         logger.info(f"Saved {len(chunks)} chunks to {output_path}")
 
@@ -2,33 +2,202 @@
 Main document processor integrating OCR, layout detection, reading order, and VLM extraction.
 """
 import logging
-import json
+import queue
+import tempfile
+import threading
+import time
 import numpy as np
+import orjson
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Iterator, Tuple
+from PIL import Image
 from pdf2image import convert_from_path
-from dataclasses import asdict
+from pdf2image.pdf2image import pdfinfo_from_path
 
 from .tesseract_ocr import TesseractOCR
-import gc
 from .layout_detector import LayoutDetector
 from .reading_order import ReadingOrderDetector
-from .vlm_extractor import VLMExtractor
+from .vlm_extractor import VLMExtractor, crop_region
 from ..config import config
 
 logger = logging.getLogger(__name__)
 
+_ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
 
-class NumpyEncoder(json.JSONEncoder):
-    """Custom JSON encoder for numpy types."""
-    def default(self, obj):
-        if isinstance(obj, (np.integer, np.int32, np.int64)):
-            return int(obj)
-        elif isinstance(obj, (np.floating, np.float32, np.float64)):
-            return float(obj)
-        elif isinstance(obj, np.ndarray):
-            return obj.tolist()
-        return super().default(obj)
+# Marks the end of the page stream between pipeline stages
+_END_OF_PAGES = object()
+
+# Region types sent to the VLM for structured extraction
+_VLM_REGION_TYPES = ('table', 'figure')
+
+
+def _put(q: queue.Queue, item: Any, stop: threading.Event, force: bool = False) -> bool:
+    """
+    Put an item on a bounded queue without blocking forever.
+
+    Args:
+        q: Target queue
+        item: Item to enqueue
+        stop: Set when the pipeline is shutting down
+        force: Keep trying after stop is set (used for end-of-stream markers)
+
+    Returns:
+        True if the item was enqueued
+    """
+    while force or not stop.is_set():
+        try:
+            q.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            if force and stop.is_set():
+                # Nobody is consuming any more; drop the oldest item
+                try:
+                    q.get_nowait()
+                except queue.Empty:
+                    pass
+    return False
+
+
+def _get(q: queue.Queue, stop: threading.Event) -> Any:
+    """
+    Get an item from a queue, returning the end marker once stop is set.
+
+    Args:
+        q: Source queue
+        stop: Set when the pipeline is shutting down
+
+    Returns:
+        Next item, or _END_OF_PAGES when the pipeline is shutting down
+    """
+    while True:
+        try:
+            return q.get(timeout=0.1)
+        except queue.Empty:
+            if stop.is_set():
+                return _END_OF_PAGES
+
+
+def _iter_pages(
+    pdf_path: Path,
+    dpi: int,
+    batch_size: int,
+    output_folder: Path
+) -> Iterator[Tuple[int, Path]]:
+    """
+    Lazily rasterize a PDF, a few pages at a time.
+
+    Pages are written as uncompressed PPM files to output_folder (ideally
+    a tmpfs such as /dev/shm) and only their paths are returned, so no
+    decoded page is held in the Python heap until a stage opens it.
+
+    Args:
+        pdf_path: Path to PDF file
+        dpi: Rendering resolution
+        batch_size: Number of pages converted per pdf2image call
+        output_folder: Directory receiving the rendered page files
+
+    Yields:
+        (page_num, page_path) tuples in page order
+    """
+    try:
+        info = pdfinfo_from_path(str(pdf_path))
+        total_pages = info.get('Pages', 0)
+    except Exception as e:
+        logger.warning(f"Could not get page count: {e}")
+        total_pages = None
+
+    if not total_pages:
+        # Fallback: convert all at once
+        paths = convert_from_path(
+            str(pdf_path),
+            dpi=dpi,
+            output_folder=str(output_folder),
+            paths_only=True
+        )
+        for page_num, path in enumerate(paths, start=1):
+            yield page_num, Path(path)
+        return
+
+    for first_page in range(1, total_pages + 1, batch_size):
+        last_page = min(first_page + batch_size - 1, total_pages)
+        paths = convert_from_path(
+            str(pdf_path),
+            dpi=dpi,
+            first_page=first_page,
+            last_page=last_page,
+            output_folder=str(output_folder),
+            paths_only=True
+        )
+        for idx, path in enumerate(paths):
+            yield first_page + idx, Path(path)
+
+
+def _load_page(path: Path) -> np.ndarray:
+    """Decode a rendered page file into an ndarray."""
+    with Image.open(path) as image:
+        return np.asarray(image)
+
+
+def _bbox_centers(ocr_items: List[Dict[str, Any]]) -> np.ndarray:
+    """
+    Collect center points of OCR token bounding boxes.
+
+    Uses the 'center' stored by the OCR engines; results without one
+    (e.g. from older cache entries) fall back to averaging the corners.
+
+    Args:
+        ocr_items: OCR results with 'center' and/or 4-point 'bbox' entries
+
+    Returns:
+        (T, 2) array of [cx, cy] per token
+    """
+    if not ocr_items:
+        return np.empty((0, 2), dtype=np.float64)
+    if 'center' in ocr_items[0]:
+        return np.asarray([item['center'] for item in ocr_items], dtype=np.float64)
+    corners = np.asarray([item['bbox'] for item in ocr_items], dtype=np.float64)
+    return corners.mean(axis=1)
+
+
+class _TokenIndex:
+    """
+    1-D spatial index over OCR token centers.
+
+    Centers are sorted by y once per page, so each region query only
+    scans the tokens within its vertical band (O(log T + k)) instead of
+    every token on the page.
+    """
+
+    def __init__(self, centers: np.ndarray):
+        """
+        Build the index.
+
+        Args:
+            centers: (T, 2) array of token center points
+        """
+        self.order = np.argsort(centers[:, 1], kind='stable')
+        self.cx = centers[self.order, 0]
+        self.cy = centers[self.order, 1]
+
+    def query(self, bbox: List[float]) -> np.ndarray:
+        """
+        Find tokens whose center lies within a bounding box.
+
+        Args:
+            bbox: Bounding box [x1, y1, x2, y2]
+
+        Returns:
+            Indices of matching tokens, in original (OCR) order
+        """
+        x1, y1, x2, y2 = bbox
+        lo = np.searchsorted(self.cy, y1, side='left')
+        hi = np.searchsorted(self.cy, y2, side='right')
+
+        band_cx = self.cx[lo:hi]
+        hits = self.order[lo:hi][(band_cx >= x1) & (band_cx <= x2)]
+        hits.sort()
+        return hits
 
 
 class DocumentProcessor:
@@ -54,6 +223,14 @@ class DocumentProcessor:
         """
         Process a complete PDF document.
 
+        Runs as a three-stage pipeline connected by bounded queues so that
+        rasterization, OCR/layout and VLM extraction overlap:
+
+        1. Render pages to images (page batches via pdf2image)
+        2. Run OCR and layout detection concurrently on each page and merge
+        3. Order each page's regions and dispatch table/figure regions to
+           the VLM in mini-batches
+
         Args:
             pdf_path: Path to PDF file
             extract_tables_charts: Whether to use VLM for table/chart extraction
@@ -63,54 +240,107 @@ class DocumentProcessor:
         """
         logger.info(f"Processing document: {pdf_path.name}")
 
-        # Convert PDF to images
-        images = convert_from_path(str(pdf_path), dpi=300)
-        logger.info(f"Converted {len(images)} pages to images")
+        use_vlm = extract_tables_charts and self.vlm_extractor is not None
+        page_queue = queue.Queue(maxsize=config.PIPELINE_QUEUE_SIZE)
+        merged_queue = queue.Queue(maxsize=config.PIPELINE_QUEUE_SIZE)
+        stop = threading.Event()
 
-        # Step 1: OCR extraction
-        logger.info("Running OCR...")
-        ocr_results = self.ocr_engine.process_pdf(pdf_path)
+        merged_pages = []
+        ordered_pages = []
+        vlm_data = {}
+        pending_regions = []
+        pending_crops = []
+        pending_since = None
 
-        # Step 2: Layout detection
-        logger.info("Detecting layout...")
-        layout_results = self.layout_detector.process_pdf_pages(images)
+        # Rendered page files live here only until they are decoded
+        render_dir = tempfile.TemporaryDirectory(prefix='render-', dir=config.RENDER_DIR)
 
-        # Step 3: Merge OCR with layout regions
-        logger.info("Merging OCR with layout...")
-        merged_pages = self._merge_ocr_and_layout(ocr_results, layout_results)
+        with render_dir, ThreadPoolExecutor(max_workers=2) as executor:
+            render_future = executor.submit(
+                self._render_stage, pdf_path, Path(render_dir.name), page_queue, stop
+            )
+            analyze_future = executor.submit(
+                self._analyze_stage, page_queue, merged_queue, stop, use_vlm
+            )
 
-        # Step 4: Determine reading order
+            # Stage 3 (this thread): collect pages and feed the VLM
+            try:
+                while True:
+                    item = merged_queue.get()
+                    if item is _END_OF_PAGES:
+                        break
+
+                    merged_page, page_crops = item
+                    merged_pages.append(merged_page)
+
+                    # Pages are independent for reading order, so order each
+                    # one while later pages are still being rendered/analyzed
+                    ordered_pages.append(
+                        self.reading_order_detector.order_page_regions(merged_page['regions'])
+                    )
+
+                    if not use_vlm:
+                        continue
+
+                    page_regions = [
+                        r for r in merged_page['regions']
+                        if r['region_type'] in _VLM_REGION_TYPES
+                    ]
+                    if page_regions:
+                        pending_regions.extend(page_regions)
+                        pending_crops.extend(page_crops)
+                        if pending_since is None:
+                            pending_since = time.monotonic()
+
+                    # Flush when the batch is full or has waited long enough
+                    if pending_regions and (
+                        len(pending_regions) >= self.vlm_extractor.max_batch
+                        or time.monotonic() - pending_since >= self.vlm_extractor.max_wait
+                    ):
+                        vlm_data.update(
+                            self.vlm_extractor.process_crops(pending_regions, pending_crops)
+                        )
+                        pending_regions = []
+                        pending_crops = []
+                        pending_since = None
+
+                if pending_regions:
+                    vlm_data.update(
+                        self.vlm_extractor.process_crops(pending_regions, pending_crops)
+                    )
+            finally:
+                stop.set()
+
+            # Surface errors raised inside the worker stages
+            render_future.result()
+            analyze_future.result()
+
+        logger.info(f"Processed {len(merged_pages)} pages")
+
+        # Number the per-page orderings document-wide
         logger.info("Determining reading order...")
         all_regions = []
         for page in merged_pages:
             all_regions.extend(page['regions'])
 
-        ordered_regions = self.reading_order_detector.determine_reading_order(all_regions)
+        ordered_regions = self.reading_order_detector.assign_reading_order(ordered_pages)
 
-        # Step 5: VLM extraction for tables and charts
-        vlm_data = {}
-        if extract_tables_charts and self.vlm_extractor is not None:
-            logger.info("Extracting tables and charts with VLM...")
-            # Filter for table and figure regions
-            table_chart_regions = [
-                r for r in all_regions
-                if r['region_type'] in ['table', 'figure']
-            ]
-
-            # Create image dictionary
-            image_dict = {i + 1: img for i, img in enumerate(images)}
-
-            vlm_data = self.vlm_extractor.process_regions(
-                table_chart_regions,
-                image_dict
-            )
-
-        # Step 6: Build final document structure
+        # Build final document structure
         document = {
             'filename': pdf_path.name,
             'num_pages': len(merged_pages),
             'pages': merged_pages,
-            'ordered_regions': [asdict(r) for r in ordered_regions],
+            'ordered_regions': [
+                {
+                    'region_id': r.region_id,
+                    'region_type': r.region_type,
+                    'bbox': r.bbox,
+                    'confidence': r.confidence,
+                    'page_num': r.page_num,
+                    'reading_order': r.reading_order
+                }
+                for r in ordered_regions
+            ],
             'vlm_extractions': vlm_data,
             'metadata': {
                 'total_regions': len(all_regions),
@@ -121,14 +351,131 @@ class DocumentProcessor:
         }
 
         logger.info(f"Document processing complete: {pdf_path.name}")
+        return document
 
-        # Clean up memory
-        del images
-        del merged_pages
-        del all_regions
-        gc.collect()
+    def _render_stage(
+        self,
+        pdf_path: Path,
+        render_dir: Path,
+        page_queue: queue.Queue,
+        stop: threading.Event
+    ):
+        """
+        Pipeline stage 1: rasterize PDF pages in small batches.
 
-        return document
+        Pages are rendered to files in render_dir and each is decoded to an
+        ndarray exactly once here for OCR and layout detection; the file is
+        deleted as soon as it has been read.
+
+        Args:
+            pdf_path: Path to PDF file
+            render_dir: Directory receiving the rendered page files
+            page_queue: Output queue of (page_num, page_array)
+            stop: Set when the pipeline is shutting down
+        """
+        try:
+            pages = _iter_pages(pdf_path, config.PDF_DPI, config.PAGE_BATCH_SIZE, render_dir)
+            for page_num, page_path in pages:
+                page_array = _load_page(page_path)
+                page_path.unlink(missing_ok=True)
+                if not _put(page_queue, (page_num, page_array), stop):
+                    return
+        finally:
+            _put(page_queue, _END_OF_PAGES, stop)
+
+    def _analyze_stage(
+        self,
+        page_queue: queue.Queue,
+        merged_queue: queue.Queue,
+        stop: threading.Event,
+        keep_images: bool
+    ):
+        """
+        Pipeline stage 2: OCR and layout detection, run concurrently.
+
+        Pages that are already rendered are grouped into batches of up to
+        PAGE_BATCH_SIZE for layout detection while OCR runs alongside.
+
+        Args:
+            page_queue: Input queue of (page_num, page_array)
+            merged_queue: Output queue of (merged_page, crops), crops being
+                the table/figure region images in region order
+            stop: Set when the pipeline is shutting down
+            keep_images: Whether to crop table/figure regions for VLM
+                extraction (the full page is never passed on)
+        """
+        batch_size = config.PAGE_BATCH_SIZE
+        ocr_workers = max(1, min(config.OCR_CONCURRENCY, batch_size))
+
+        try:
+            with ThreadPoolExecutor(max_workers=ocr_workers) as ocr_executor:
+                finished = False
+                while not finished:
+                    item = _get(page_queue, stop)
+                    if item is _END_OF_PAGES:
+                        break
+
+                    # Take whatever else is already rendered, up to a full batch
+                    batch = [item]
+                    while len(batch) < batch_size:
+                        try:
+                            item = page_queue.get_nowait()
+                        except queue.Empty:
+                            break
+                        if item is _END_OF_PAGES:
+                            finished = True
+                            break
+                        batch.append(item)
+
+                    page_nums = [page_num for page_num, _ in batch]
+                    arrays = [page_array for _, page_array in batch]
+                    logger.info(f"Analyzing pages {page_nums[0]}-{page_nums[-1]}")
+
+                    ocr_futures = [
+                        ocr_executor.submit(self._ocr_page, page_array, page_num)
+                        for page_num, page_array in batch
+                    ]
+                    batch_regions = self.layout_detector.detect_batch(arrays, page_nums)
+
+                    for (page_num, page_array), regions, ocr_future in zip(
+                        batch, batch_regions, ocr_futures
+                    ):
+                        height, width = page_array.shape[:2]
+                        layout_page = {
+                            'page_num': page_num,
+                            'width': width,
+                            'height': height,
+                            'regions': regions
+                        }
+                        merged_page = self._merge_ocr_and_layout(
+                            [ocr_future.result()], [layout_page]
+                        )[0]
+                        # Crop VLM regions now, while the page is in memory
+                        crops = [
+                            crop_region(page_array, r.bbox)
+                            for r in regions if r.region_type in _VLM_REGION_TYPES
+                        ] if keep_images else []
+                        if not _put(merged_queue, (merged_page, crops), stop):
+                            return
+        except BaseException:
+            # Unblock the renderer if it is waiting on a full queue
+            stop.set()
+            raise
+        finally:
+            _put(merged_queue, _END_OF_PAGES, stop, force=True)
+
+    def _ocr_page(self, page_array: np.ndarray, page_num: int) -> Dict[str, Any]:
+        """
+        Run OCR on a rendered page (empty result when OCR is disabled).
+
+        The page is shared with layout detection; Tesseract gets an
+        in-memory downscale to OCR_DPI with boxes mapped back to the
+        page's own coordinates.
+        """
+        if self.ocr_engine is None:
+            return {'page_num': page_num, 'ocr_results': []}
+        scale = min(1.0, config.OCR_DPI / config.PDF_DPI)
+        return self.ocr_engine.process_image(page_array, page_num, scale)
 
     def _merge_ocr_and_layout(
         self,
@@ -138,9 +485,13 @@ class DocumentProcessor:
         """
         Merge OCR text with layout regions.
 
+        Layout regions stay LayoutRegion objects until this point; each
+        is flattened into its output dict exactly once, here.
+
         Args:
             ocr_results: OCR results by page
-            layout_results: Layout detection results by page
+            layout_results: Layout detection results by page (regions as
+                LayoutRegion objects)
 
         Returns:
             Merged page data with text in each region
@@ -150,18 +501,28 @@ class DocumentProcessor:
         for ocr_page, layout_page in zip(ocr_results, layout_results):
             page_num = ocr_page['page_num']
 
+            # OCR token centers, computed once per page for all regions
+            ocr_items = ocr_page['ocr_results']
+            texts = [item['text'] for item in ocr_items]
+            token_index = _TokenIndex(_bbox_centers(ocr_items))
+
             # Process each layout region
             enriched_regions = []
             for region in layout_page['regions']:
                 # Extract text from OCR results within this region's bbox
                 region_text = self._extract_text_from_region(
-                    ocr_page['ocr_results'],
-                    region['bbox']
+                    token_index,
+                    texts,
+                    region.bbox
                 )
 
                 # Enrich region with text
                 enriched_region = {
-                    **region,
+                    'region_id': region.region_id,
+                    'region_type': region.region_type,
+                    'bbox': region.bbox,
+                    'confidence': region.confidence,
+                    'page_num': region.page_num,
                     'text': region_text
                 }
                 enriched_regions.append(enriched_region)
@@ -177,33 +538,25 @@ class DocumentProcessor:
 
     def _extract_text_from_region(
         self,
-        ocr_results: List[Dict[str, Any]],
+        token_index: _TokenIndex,
+        texts: List[str],
         region_bbox: List[float]
     ) -> str:
         """
         Extract OCR text that falls within a region's bounding box.
 
         Args:
-            ocr_results: List of OCR results
+            token_index: Spatial index over the page's OCR token centers
+            texts: OCR token texts, aligned with the indexed centers
             region_bbox: Region bounding box [x1, y1, x2, y2]
 
         Returns:
             Concatenated text from the region
         """
-        x1, y1, x2, y2 = region_bbox
-        texts = []
-
-        for ocr_item in ocr_results:
-            # Get center point of OCR bbox
-            bbox = ocr_item['bbox']
-            cx = sum(p[0] for p in bbox) / 4
-            cy = sum(p[1] for p in bbox) / 4
-
-            # Check if center is within region bbox
-            if x1 <= cx <= x2 and y1 <= cy <= y2:
-                texts.append(ocr_item['text'])
+        if not texts:
+            return ''
 
-        return ' '.join(texts)
+        return ' '.join(texts[i] for i in token_index.query(region_bbox))
 
     def save_processed_document(
         self,
@@ -223,8 +576,9 @@ class DocumentProcessor:
         output_dir.mkdir(parents=True, exist_ok=True)
         output_path = output_dir / f"{document['filename']}.json"
 
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(document, f, indent=2, ensure_ascii=False, cls=NumpyEncoder)
+        # orjson serializes numpy scalars/arrays natively (no Python encoder hook)
+        with open(output_path, 'wb') as f:
+            f.write(orjson.dumps(document, option=_ORJSON_OPTIONS))
 
         logger.info(f"Saved processed document to {output_path}")
         return output_path
@@ -239,8 +593,8 @@ class DocumentProcessor:
         Returns:
             Processed document structure
         """
-        with open(json_path, 'r', encoding='utf-8') as f:
-            document = json.load(f)
+        with open(json_path, 'rb') as f:
+            document = orjson.loads(f.read())
 
         logger.info(f"Loaded processed document from {json_path}")
         return document
@@ -3,7 +3,7 @@ OCR engine using PaddleOCR for text extraction with bounding boxes and confidenc
 """
 import logging
 from pathlib import Path
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Optional, Tuple, Union
 import numpy as np
 from PIL import Image
 from paddleocr import PaddleOCR
@@ -15,7 +15,7 @@ from ..config import config
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+@dataclass(slots=True)
 class OCRResult:
     """Container for OCR results."""
     text: str
@@ -63,19 +63,24 @@ class OCREngine:
         logger.info(f"Completed OCR for {len(page_results)} pages")
         return page_results
 
-    def _process_page(self, image: Image.Image, page_num: int) -> Dict[str, Any]:
+    def _process_page(
+        self,
+        image: Union[Image.Image, np.ndarray],
+        page_num: int
+    ) -> Dict[str, Any]:
         """
         Process a single page image with OCR.
 
         Args:
-            image: PIL Image object
+            image: PIL Image object, or the page already converted to an array
             page_num: Page number
 
         Returns:
             Dictionary containing page results
         """
-        # Convert PIL Image to numpy array
-        img_array = np.array(image)
+        # Convert PIL Image to numpy array (arrays are used as-is)
+        img_array = np.asarray(image)
+        height, width = img_array.shape[:2]
 
         # Run OCR
         ocr_results = self.ocr.ocr(img_array)
@@ -93,21 +98,49 @@ class OCREngine:
                     ocr_data.append({
                         'text': text,
                         'bbox': bbox,
+                        'center': [
+                            sum(point[0] for point in bbox) / 4,
+                            sum(point[1] for point in bbox) / 4
+                        ],
                         'confidence': confidence,
                         'page_num': page_num
                     })
 
         return {
             'page_num': page_num,
-            'width': image.width,
-            'height': image.height,
+            'width': width,
+            'height': height,
             'ocr_results': ocr_data
         }
 
+    @staticmethod
+    def token_centers(page_result: Dict[str, Any]) -> np.ndarray:
+        """
+        Collect center points of a page's OCR tokens.
+
+        Compute this once per page and pass it to get_text_from_bbox for
+        every region on that page.
+
+        Args:
+            page_result: Page OCR result
+
+        Returns:
+            (T, 2) array of [cx, cy] per token
+        """
+        ocr_items = page_result['ocr_results']
+        if not ocr_items:
+            return np.empty((0, 2), dtype=np.float64)
+
+        # Precomputed when OCR ran; older results only carry the corners
+        if 'center' in ocr_items[0]:
+            return np.asarray([item['center'] for item in ocr_items], dtype=np.float64)
+        return np.asarray([item['bbox'] for item in ocr_items], dtype=np.float64).mean(axis=1)
+
     def get_text_from_bbox(
         self,
         page_result: Dict[str, Any],
-        target_bbox: List[float]
+        target_bbox: List[float],
+        centers: Optional[np.ndarray] = None
     ) -> str:
         """
         Extract text from a specific bounding box region.
@@ -115,21 +148,24 @@ class OCREngine:
         Args:
             page_result: Page OCR result
             target_bbox: Target bounding box [x1, y1, x2, y2]
+            centers: token_centers(page_result), shared across the page's
+                regions; computed here if not given
 
         Returns:
             Concatenated text from the region
         """
-        texts = []
-        x1, y1, x2, y2 = target_bbox
+        ocr_items = page_result['ocr_results']
+        if not ocr_items:
+            return ''
+
+        if centers is None:
+            centers = self.token_centers(page_result)
 
-        for ocr_item in page_result['ocr_results']:
-            # Get center point of OCR bbox
-            bbox = ocr_item['bbox']
-            cx = sum(p[0] for p in bbox) / 4
-            cy = sum(p[1] for p in bbox) / 4
+        x1, y1, x2, y2 = target_bbox
+        cx = centers[:, 0]
+        cy = centers[:, 1]
 
-            # Check if center is within target bbox
-            if x1 <= cx <= x2 and y1 <= cy <= y2:
-                texts.append(ocr_item['text'])
+        # Check which centers fall within target bbox
+        mask = (cx >= x1) & (cx <= x2) & (cy >= y1) & (cy <= y2)
 
-        return ' '.join(texts)
+        return ' '.join(ocr_items[i]['text'] for i in np.flatnonzero(mask))
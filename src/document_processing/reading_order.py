@@ -2,13 +2,14 @@
 Reading order detection for multi-column and complex document layouts.
 """
 import logging
-from typing import List, Dict, Any
+import numpy as np
+from typing import List, Dict, Any, Iterable
 from dataclasses import dataclass
 
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+@dataclass(slots=True)
 class OrderedRegion:
     """Container for region with reading order."""
     region_id: str
@@ -64,13 +65,32 @@ class ReadingOrderDetector:
             regions_by_page[page_num].append(region)
 
         # Process each page
+        return self.assign_reading_order(
+            self.order_page_regions(regions_by_page[page_num])
+            for page_num in sorted(regions_by_page.keys())
+        )
+
+    def assign_reading_order(
+        self,
+        ordered_pages: Iterable[List[Dict[str, Any]]]
+    ) -> List[OrderedRegion]:
+        """
+        Number already-ordered pages into one document-wide reading order.
+
+        Pages carry no cross-page state, so callers can order each page as
+        soon as it is available (see order_page_regions) and run only this
+        cheap sweep once the whole document is done.
+
+        Args:
+            ordered_pages: Per-page region lists, pages in document order
+
+        Returns:
+            List of regions with reading order assigned
+        """
         ordered_regions = []
         global_order = 0
 
-        for page_num in sorted(regions_by_page.keys()):
-            page_regions = regions_by_page[page_num]
-            page_ordered = self._order_page_regions(page_regions)
-
+        for page_ordered in ordered_pages:
             # Assign global reading order
             for region_data in page_ordered:
                 ordered_region = OrderedRegion(
@@ -87,7 +107,7 @@ class ReadingOrderDetector:
         logger.info(f"Assigned reading order to {len(ordered_regions)} regions")
         return ordered_regions
 
-    def _order_page_regions(
+    def order_page_regions(
         self,
         regions: List[Dict[str, Any]]
     ) -> List[Dict[str, Any]]:
@@ -108,82 +128,67 @@ class ReadingOrderDetector:
         if not regions:
             return []
 
-        # Detect columns
-        columns = self._detect_columns(regions)
-
-        # Sort columns left to right
-        sorted_columns = sorted(columns, key=lambda col: col['x_center'])
+        bboxes = np.asarray([region['bbox'] for region in regions], dtype=np.float64)
+        columns = self._column_ranks(bboxes)
+        priorities = np.fromiter(
+            (self.type_priority.get(r['region_type'], 5) for r in regions),
+            dtype=np.int8,
+            count=len(regions)
+        )
 
-        # Order regions within each column
-        ordered_regions = []
-        for column in sorted_columns:
-            column_regions = column['regions']
-            # Sort by: 1) type priority, 2) vertical position (top to bottom)
-            column_regions.sort(key=lambda r: (
-                self.type_priority.get(r['region_type'], 5),
-                r['bbox'][1]  # y1 coordinate
-            ))
-            ordered_regions.extend(column_regions)
+        # Columns left to right, then within each column by:
+        # 1) type priority, 2) vertical position (top to bottom).
+        # lexsort is stable, so exact ties keep detection order.
+        order = np.lexsort((bboxes[:, 1], priorities, columns))
+        return [regions[i] for i in order]
 
-        return ordered_regions
-
-    def _detect_columns(
-        self,
-        regions: List[Dict[str, Any]],
+    @staticmethod
+    def _column_ranks(
+        bboxes: np.ndarray,
         column_threshold: float = 50.0
-    ) -> List[Dict[str, Any]]:
+    ) -> np.ndarray:
         """
-        Detect columns in a page layout using horizontal clustering.
+        Assign each region to a column, numbered left to right.
+
+        Region centers are binned at column_threshold resolution; local
+        maxima of the histogram are column positions, and each region is
+        assigned to its nearest peak. Unlike a running-average sweep this
+        does not depend on the order regions are visited in.
 
         Args:
-            regions: List of regions
+            bboxes: (N, 4) array of [x1, y1, x2, y2]
             column_threshold: Minimum horizontal distance to define separate columns
 
         Returns:
-            List of column dictionaries with regions grouped
+            (N,) array of column indices, 0 being the leftmost column
         """
-        if not regions:
-            return []
-
-        # Calculate center x-coordinate for each region
-        region_centers = []
-        for region in regions:
-            x1, y1, x2, y2 = region['bbox']
-            x_center = (x1 + x2) / 2
-            region_centers.append((x_center, region))
-
-        # Sort by x-center
-        region_centers.sort(key=lambda x: x[0])
-
-        # Cluster into columns
-        columns = []
-        current_column = {
-            'x_center': region_centers[0][0],
-            'regions': [region_centers[0][1]]
-        }
-
-        for x_center, region in region_centers[1:]:
-            # Check if this region belongs to current column
-            if abs(x_center - current_column['x_center']) < column_threshold:
-                current_column['regions'].append(region)
-                # Update column center (weighted average)
-                n = len(current_column['regions'])
-                current_column['x_center'] = (
-                    (current_column['x_center'] * (n - 1) + x_center) / n
-                )
-            else:
-                # Start new column
-                columns.append(current_column)
-                current_column = {
-                    'x_center': x_center,
-                    'regions': [region]
-                }
-
-        # Add last column
-        columns.append(current_column)
-
-        logger.debug(f"Detected {len(columns)} columns")
-        return columns
+        x_centers = (bboxes[:, 0] + bboxes[:, 2]) * 0.5
+
+        # Histogram of x-centers over the page extent
+        page_width = max(float(bboxes[:, 2].max()), 1.0)
+        n_bins = max(1, int(page_width / column_threshold))
+        # Centers left of the origin (negative coordinates) are clipped in,
+        # so every region is counted and there is always at least one peak
+        counts, edges = np.histogram(
+            np.clip(x_centers, 0.0, page_width), bins=n_bins, range=(0.0, page_width)
+        )
+
+        # Peaks: non-empty bins at least as high as the left neighbour and
+        # higher than the right one (so plateaus yield a single peak)
+        padded = np.concatenate(([0], counts, [0]))
+        is_peak = (counts > 0) & (counts >= padded[:-2]) & (counts > padded[2:])
+        peak_bins = np.flatnonzero(is_peak)
+        peaks = (edges[peak_bins] + edges[peak_bins + 1]) * 0.5
+
+        # Assign each region to the nearest peak
+        assignment = np.argmin(np.abs(x_centers[:, None] - peaks[None, :]), axis=1)
+
+        # Renumber the non-empty columns by their mean x-center
+        used, labels, sizes = np.unique(assignment, return_inverse=True, return_counts=True)
+        means = np.bincount(labels, weights=x_centers) / sizes
+        rank_of = np.empty(len(used), dtype=np.intp)
+        rank_of[np.argsort(means, kind='stable')] = np.arange(len(used))
+        return rank_of[labels]
 
     @staticmethod
     def get_ordered_text(
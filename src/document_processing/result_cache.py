@@ -0,0 +1,119 @@
+"""
+Content-addressed on-disk cache for OCR, layout and VLM results.
+"""
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Optional, Union
+
+import numpy as np
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+
+def image_digest(image: Union[Image.Image, np.ndarray]) -> bytes:
+    """
+    Hash the decoded pixels of an image.
+
+    Arrays are hashed through the buffer protocol without copying, so
+    callers that already hold the page as an ndarray should pass that.
+
+    Args:
+        image: PIL Image object or image array
+
+    Returns:
+        16-byte blake2b digest of shape, dtype and pixel data
+    """
+    pixels = np.ascontiguousarray(image)
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f"{pixels.shape}:{pixels.dtype}".encode())
+    h.update(pixels)
+    return h.digest()
+
+
+class ResultCache:
+    """
+    JSON-file cache keyed by content hash.
+
+    Re-processing the same document (common while iterating on chunking
+    or reading order) then skips OCR, layout detection and VLM calls for
+    every page or region whose pixels are unchanged.
+    """
+
+    def __init__(self, directory: Path, namespace: str, version: str = ""):
+        """
+        Initialize cache.
+
+        Args:
+            directory: Root cache directory
+            namespace: Subdirectory for this kind of result (e.g. 'ocr')
+            version: Mixed into every key; change it to invalidate old entries
+        """
+        self.directory = Path(directory) / namespace
+        self.version = version
+
+    def key(self, *parts: Union[bytes, memoryview, str]) -> str:
+        """
+        Build a cache key from content parts.
+
+        Args:
+            *parts: Digests, raw bytes or strings identifying the input
+
+        Returns:
+            Hex key
+        """
+        h = hashlib.blake2b(self.version.encode(), digest_size=16)
+        for part in parts:
+            h.update(part.encode() if isinstance(part, str) else part)
+            h.update(b"\0")
+        return h.hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Look up a cached result.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Cached value, or None on a miss
+        """
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable cache entry {path}: {e}")
+            return None
+
+    def set(self, key: str, value: Any):
+        """
+        Store a result.
+
+        Args:
+            key: Cache key
+            value: JSON-serializable value
+        """
+        path = self._path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Write to a temp file and rename so readers never see partial JSON
+            fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump(value, f, ensure_ascii=False)
+                os.replace(tmp_path, path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        except Exception as e:
+            logger.warning(f"Failed to write cache entry {path}: {e}")
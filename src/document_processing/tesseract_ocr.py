@@ -3,20 +3,23 @@ Lightweight OCR engine using Tesseract for text extraction.
 Memory-efficient alternative to PaddleOCR for systems with limited RAM.
 """
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Union
+import numpy as np
 import pytesseract
 from PIL import Image
 from pdf2image import convert_from_path
 from dataclasses import dataclass
 import gc
 
+from .result_cache import ResultCache, image_digest
 from ..config import config
 
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+@dataclass(slots=True)
 class OCRResult:
     """Container for OCR results."""
     text: str
@@ -32,26 +35,46 @@ class TesseractOCR:
         """Initialize Tesseract OCR engine."""
         # Test if tesseract is available
         try:
-            pytesseract.get_tesseract_version()
+            tesseract_version = pytesseract.get_tesseract_version()
             logger.info("Tesseract OCR engine initialized")
         except Exception as e:
             logger.error(f"Tesseract not found: {e}")
             raise
 
-    def process_pdf(self, pdf_path: Path, batch_size: int = 3) -> List[Dict[str, Any]]:
+        # Results are keyed by page pixels; the version invalidates entries
+        # when the engine or confidence settings change
+        self.cache = ResultCache(
+            config.CACHE_DIR,
+            'ocr',
+            version=f"tesseract-{tesseract_version}-eng-{config.OCR_CONFIDENCE_THRESHOLD}"
+        ) if config.USE_PROCESSING_CACHE else None
+
+    def process_pdf(
+        self,
+        pdf_path: Path,
+        batch_size: int = 3,
+        images: Optional[List[Image.Image]] = None,
+        scale: float = 1.0
+    ) -> List[Dict[str, Any]]:
         """
         Process a PDF file and extract text with bounding boxes.
-        Processes in small batches to reduce memory usage.
+        Processes in small batches to reduce memory usage; pages within a
+        batch are OCR'd concurrently (each runs its own tesseract process).
 
         Args:
             pdf_path: Path to PDF file
             batch_size: Number of pages to process at once (smaller = less memory)
+            images: Already rendered page images; skips PDF conversion if given
+            scale: Downscale factor applied to supplied images before OCR
 
         Returns:
             List of page results with OCR data
         """
         logger.info(f"Processing PDF: {pdf_path.name}")
 
+        if images is not None:
+            return self.process_images(images, scale=scale)
+
         # Get page count first
         try:
             from pdf2image.pdf2image import pdfinfo_from_path
@@ -63,67 +86,121 @@ class TesseractOCR:
             total_pages = None
 
         page_results = []
+        workers = max(1, min(config.OCR_CONCURRENCY, batch_size))
 
         # Process in batches to save memory
-        if total_pages:
-            for start_page in range(1, total_pages + 1, batch_size):
-                end_page = min(start_page + batch_size - 1, total_pages)
-                logger.info(f"Processing pages {start_page}-{end_page}/{total_pages}")
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            if total_pages:
+                for start_page in range(1, total_pages + 1, batch_size):
+                    end_page = min(start_page + batch_size - 1, total_pages)
+                    logger.info(f"Processing pages {start_page}-{end_page}/{total_pages}")
 
-                try:
-                    # Convert only this batch of pages
-                    images = convert_from_path(
-                        str(pdf_path),
-                        dpi=200,  # Lower DPI for less memory
-                        first_page=start_page,
-                        last_page=end_page
-                    )
+                    try:
+                        # Convert only this batch of pages
+                        images = convert_from_path(
+                            str(pdf_path),
+                            dpi=200,  # Lower DPI for less memory
+                            first_page=start_page,
+                            last_page=end_page
+                        )
 
-                    # Process each page in the batch
-                    for idx, image in enumerate(images):
-                        page_num = start_page + idx
-                        logger.debug(f"OCR on page {page_num}")
-                        page_result = self._process_page(image, page_num)
-                        page_results.append(page_result)
+                        # Process the pages of this batch concurrently
+                        page_nums = range(start_page, start_page + len(images))
+                        page_results.extend(executor.map(self._process_page, images, page_nums))
 
-                        # Clean up image immediately
-                        del image
+                        # Clean up batch
+                        del images
+                        gc.collect()
 
-                    # Clean up batch
+                    except Exception as e:
+                        logger.error(f"Failed to process pages {start_page}-{end_page}: {e}")
+            else:
+                # Fallback: convert all at once (less memory efficient)
+                try:
+                    images = convert_from_path(str(pdf_path), dpi=200)
+                    page_results.extend(
+                        executor.map(self._process_page, images, range(1, len(images) + 1))
+                    )
                     del images
                     gc.collect()
-
                 except Exception as e:
-                    logger.error(f"Failed to process pages {start_page}-{end_page}: {e}")
-        else:
-            # Fallback: convert all at once (less memory efficient)
-            try:
-                images = convert_from_path(str(pdf_path), dpi=200)
-                for page_num, image in enumerate(images, start=1):
-                    logger.debug(f"Processing page {page_num}/{len(images)}")
-                    page_result = self._process_page(image, page_num)
-                    page_results.append(page_result)
-                    del image
-                del images
-                gc.collect()
-            except Exception as e:
-                logger.error(f"Failed to convert PDF to images: {e}")
-                return []
+                    logger.error(f"Failed to convert PDF to images: {e}")
+                    return []
 
         logger.info(f"Completed OCR for {len(page_results)} pages")
         return page_results
 
-    def _process_page(self, image: Image.Image, page_num: int) -> Dict[str, Any]:
+    def process_images(
+        self,
+        images: List[Image.Image],
+        start_page: int = 1,
+        scale: float = 1.0
+    ) -> List[Dict[str, Any]]:
+        """
+        Run OCR on already rendered page images.
+
+        Lets callers that rasterize the PDF themselves share one rendering
+        pass between OCR and layout detection.
+
+        Args:
+            images: List of PIL Image objects
+            start_page: Page number of the first image
+            scale: Downscale factor applied before OCR; bounding boxes are
+                mapped back to the original image coordinates
+
+        Returns:
+            List of page results with OCR data
+        """
+        workers = max(1, min(config.OCR_CONCURRENCY, len(images)))
+        page_nums = range(start_page, start_page + len(images))
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            page_results = list(executor.map(
+                lambda image, page_num: self._process_page(image, page_num, scale),
+                images,
+                page_nums
+            ))
+
+        logger.info(f"Completed OCR for {len(page_results)} pages")
+        return page_results
+
+    def _process_page(
+        self,
+        image: Union[Image.Image, np.ndarray],
+        page_num: int,
+        scale: float = 1.0
+    ) -> Dict[str, Any]:
         """
         Process a single page image with OCR.
 
         Args:
-            image: PIL Image object
+            image: PIL Image object, or the page already converted to an array
             page_num: Page number
+            scale: Downscale factor applied before OCR (1.0 = full size)
 
         Returns:
             Dictionary containing page results
         """
+        cache_key = None
+        if self.cache is not None:
+            cache_key = self.cache.key(image_digest(image), f"scale={scale}")
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return {
+                    'page_num': page_num,
+                    'ocr_results': cached
+                }
+
+        # Only build a PIL image from an array once the cache has missed
+        if isinstance(image, np.ndarray):
+            image = Image.fromarray(image)
+
+        if scale < 1.0:
+            image = image.resize(
+                (int(image.width * scale), int(image.height * scale)),
+                Image.Resampling.BILINEAR
+            )
+
         # Get OCR data with bounding boxes
         ocr_data = pytesseract.image_to_data(
             image,
@@ -131,51 +208,64 @@ class TesseractOCR:
             lang='eng'
         )
 
-        # Parse results
-        ocr_results = []
-        n_boxes = len(ocr_data['text'])
-
-        for i in range(n_boxes):
-            text = ocr_data['text'][i].strip()
-            conf = int(ocr_data['conf'][i])
-
-            # Filter out low confidence and empty text
-            if conf > 0 and text:
-                x, y, w, h = (
-                    ocr_data['left'][i],
-                    ocr_data['top'][i],
-                    ocr_data['width'][i],
-                    ocr_data['height'][i]
-                )
-
-                # Create bbox in the format expected [[x1,y1], [x2,y2], [x3,y3], [x4,y4]]
-                bbox = [
-                    [x, y],
-                    [x + w, y],
-                    [x + w, y + h],
-                    [x, y + h]
-                ]
-
-                ocr_results.append({
-                    'text': text,
-                    'bbox': bbox,
-                    'confidence': conf / 100.0  # Normalize to 0-1
-                })
+        # Parse results: filter on confidence in numpy so the (mostly empty)
+        # rejected rows never become Python objects
+        texts = ocr_data['text']
+        conf = np.asarray(ocr_data['conf'], dtype=np.float32).astype(np.int16)
+        keep = [i for i in np.flatnonzero(conf > 0) if texts[i].strip()]
+
+        x, y, w, h = (
+            np.asarray(ocr_data[field], dtype=np.float64)[keep]
+            for field in ('left', 'top', 'width', 'height')
+        )
+        if scale < 1.0:
+            # Map back to the coordinates of the full-size image
+            x, y, w, h = (np.rint(v / scale) for v in (x, y, w, h))
+
+        # Bboxes in the format expected [[x1,y1], [x2,y2], [x3,y3], [x4,y4]]
+        corners = np.stack([
+            np.stack([x, y], axis=1),
+            np.stack([x + w, y], axis=1),
+            np.stack([x + w, y + h], axis=1),
+            np.stack([x, y + h], axis=1)
+        ], axis=1).astype(np.int64)
+
+        # Token centers, stored so region assignment needs no reduction later
+        centers = (corners[:, 0] + corners[:, 2]) * 0.5
+
+        ocr_results = [
+            {
+                'text': texts[i].strip(),
+                'bbox': bbox,
+                'center': center,
+                'confidence': int(conf[i]) / 100.0  # Normalize to 0-1
+            }
+            for i, bbox, center in zip(keep, corners.tolist(), centers.tolist())
+        ]
+
+        if cache_key is not None:
+            self.cache.set(cache_key, ocr_results)
 
         return {
             'page_num': page_num,
             'ocr_results': ocr_results
         }
 
-    def process_image(self, image: Image.Image, page_num: int = 1) -> Dict[str, Any]:
+    def process_image(
+        self,
+        image: Union[Image.Image, np.ndarray],
+        page_num: int = 1,
+        scale: float = 1.0
+    ) -> Dict[str, Any]:
         """
         Process a single image with OCR.
 
         Args:
-            image: PIL Image object
+            image: PIL Image object or image array
             page_num: Page number (default 1)
+            scale: Downscale factor applied before OCR (1.0 = full size)
 
         Returns:
             Dictionary containing OCR results
         """
-        return self._process_page(image, page_num)
+        return self._process_page(image, page_num, scale)
@@ -1,18 +1,276 @@
 """
 Vision-Language Model for extracting structured data from tables and charts.
 """
+import asyncio
+import hashlib
 import logging
-import json
-from typing import Dict, Any, List, Optional
+from collections import Counter, OrderedDict, defaultdict
+import orjson
+import random
+import re
+import threading
+import time
+from typing import Dict, Any, List, Optional, Callable, Tuple, Union
 from pathlib import Path
+import httpx
+import numpy as np
+from openai import AsyncOpenAI, OpenAI, RateLimitError
 from PIL import Image
 import base64
 from io import BytesIO
 
+from .result_cache import ResultCache, image_digest
 from ..config import config
 
 logger = logging.getLogger(__name__)
 
+# Rendered page, either as a PIL image or as the pipeline's pixel array
+PageImage = Union[Image.Image, np.ndarray]
+
+# Successful extractions remembered per extractor, so identical crops on
+# later pages (repeated logos, boilerplate tables) are not sent again
+_EXTRACTED_MEMO_SIZE = 256
+
+# Connection pool shared by all requests of one client: keep-alive lets
+# consecutive region calls skip the TCP and TLS handshakes
+_HTTP_LIMITS = httpx.Limits(
+    max_keepalive_connections=20,
+    max_connections=100,
+    keepalive_expiry=30.0
+)
+_HTTP_TIMEOUT = httpx.Timeout(60.0, connect=10.0)
+
+# Characters that matter when scanning for the end of a JSON object
+_JSON_TOKEN = re.compile(r'[{}"\\]')
+
+_TABLE_PROMPT = """Analyze this table image and extract structured information.
+
+You MUST respond with ONLY a valid JSON object. Do not include any text before or after the JSON.
+Do not use markdown code blocks. Just return the raw JSON.
+
+Return this exact structure:
+{
+    "headers": ["col1", "col2"],
+    "rows": [["val1", "val2"], ["val3", "val4"]],
+    "units": "description of units if any or empty string",
+    "footnotes": "any footnotes or empty string",
+    "summary": "brief description of what the table shows"
+}
+
+Extract all visible data. If you cannot see the table clearly, return empty arrays for headers and rows.
+Respond with JSON only, no other text."""
+
+_CHART_PROMPT = """Analyze this chart/figure and extract key information.
+
+You MUST respond with ONLY a valid JSON object. Do not include any text before or after the JSON.
+Do not use markdown code blocks. Just return the raw JSON.
+
+Return this exact structure:
+{
+    "chart_type": "bar/line/scatter/pie/diagram/other",
+    "title": "chart title if visible or empty string",
+    "x_axis": {"label": "x-axis label", "values": ["val1", "val2"]},
+    "y_axis": {"label": "y-axis label", "range": "min-max"},
+    "data_series": [{"name": "series1", "description": "what it shows"}],
+    "key_insights": ["insight1", "insight2"],
+    "trends": "description of visible trends",
+    "anomalies": "any notable anomalies or empty string",
+    "summary": "comprehensive description of what the chart shows"
+}
+
+If you cannot clearly see certain elements, use empty strings or empty arrays.
+Respond with JSON only, no other text."""
+
+
+# Expected shape of VLM responses: (field, type, default factory). A missing
+# or mistyped field gets its default; optional fields (no default) are
+# dropped when mistyped, so downstream formatting can trust the types.
+_TABLE_FIELDS = (
+    ('headers', list, list),
+    ('rows', list, list),
+    ('summary', str, str),
+)
+_CHART_FIELDS = (
+    ('chart_type', str, lambda: 'unknown'),
+    ('summary', str, str),
+    ('x_axis', dict, None),
+    ('y_axis', dict, None),
+    ('data_series', list, None),
+    ('key_insights', list, None),
+)
+
+
+def _conform(data: Any, fields: Tuple[Tuple[str, type, Optional[Callable[[], Any]]], ...]) -> Dict[str, Any]:
+    """
+    Check a parsed VLM response against its expected fields.
+
+    Args:
+        data: Parsed JSON
+        fields: Field specs (_TABLE_FIELDS or _CHART_FIELDS)
+
+    Returns:
+        The response dict with defaults filled in
+
+    Raises:
+        ValueError: If the response is not a JSON object
+    """
+    if not isinstance(data, dict):
+        raise ValueError(f"Expected a JSON object, got {type(data).__name__}")
+
+    for name, kind, default in fields:
+        if isinstance(data.get(name), kind):
+            continue
+        if name in data:
+            logger.debug(f"Discarding '{name}' of type {type(data[name]).__name__}")
+        if default is None:
+            data.pop(name, None)
+        else:
+            data[name] = default()
+    return data
+
+
+def _extract_json_span(text: str) -> str:
+    """
+    Cut the first complete JSON object out of a response.
+
+    Scans once from the first '{', tracking brace depth outside string
+    literals (and escapes inside them), so code fences, leading prose and
+    trailing text are all dropped without backtracking regexes.
+
+    Args:
+        text: Raw response text
+
+    Returns:
+        The outermost object, the unterminated tail if the response was
+        truncated, or the text unchanged if it contains no '{'
+    """
+    start = text.find('{')
+    if start < 0:
+        return text
+
+    depth = 0
+    in_string = False
+    skip_to = -1
+    for match in _JSON_TOKEN.finditer(text, start):
+        i = match.start()
+        if i < skip_to:
+            continue  # escaped character
+        char = text[i]
+        if in_string:
+            if char == '\\':
+                skip_to = i + 2
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char == '{':
+            depth += 1
+        elif char == '}':
+            depth -= 1
+            if depth == 0:
+                return text[start:i + 1]
+    return text[start:]
+
+
+# Grayscale spread below which a crop is treated as blank (0-255 scale)
+_BLANK_STD = 8.0
+
+
+def _crop_thumbnail(image: Image.Image) -> np.ndarray:
+    """Shrink a crop to a 64x64 grayscale array for cheap whole-image checks."""
+    if 0 in image.size:
+        # Degenerate bbox: nothing to look at
+        return np.zeros((64, 64), dtype=np.uint8)
+    return np.asarray(image.resize((64, 64), Image.Resampling.BILINEAR).convert('L'))
+
+
+def _crop_fingerprint(size: Tuple[int, int], thumb: np.ndarray) -> bytes:
+    """
+    Cheap candidate key for a cropped region, for in-run deduplication.
+
+    Hashes the crop size plus its 64x64 grayscale thumbnail instead of the
+    full pixel buffer. It is lossy: same-size tables from one template
+    that differ in a few digits can share a fingerprint, so a match is
+    only a candidate and must be confirmed with image_digest.
+
+    Args:
+        size: Crop (width, height)
+        thumb: Thumbnail from _crop_thumbnail
+
+    Returns:
+        16-byte digest
+    """
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f"{size}".encode())
+    h.update(thumb)
+    return h.digest()
+
+
+def _is_blank(thumb: np.ndarray) -> bool:
+    """
+    Check whether a crop is (nearly) uniform, e.g. a misdetected margin.
+
+    Only the spread is tested, not brightness: a sparse line chart on a
+    white background is mostly white too.
+    """
+    return float(thumb.std()) < _BLANK_STD
+
+
+def crop_region(image: PageImage, bbox: List[float]) -> PageImage:
+    """
+    Crop a region out of a page.
+
+    Array pages are sliced and copied, so the crop owns only the region's
+    pixels and the page can be released independently.
+
+    Args:
+        image: Page as PIL Image or array
+        bbox: Region bounding box [x1, y1, x2, y2]
+
+    Returns:
+        Cropped region, of the same kind as the page
+    """
+    x1, y1, x2, y2 = map(int, bbox)
+    if isinstance(image, np.ndarray):
+        return image[max(y1, 0):y2, max(x1, 0):x2].copy()
+    return image.crop((x1, y1, x2, y2))
+
+
+class _TokenBucket:
+    """
+    Requests-per-minute limiter shared by the sync and async call paths.
+
+    Each request reserves a token; once the burst allowance is used up,
+    callers are spaced out at the refill rate instead of all hitting the
+    provider and failing with 429 together.
+    """
+
+    def __init__(self, rpm: int):
+        self.capacity = float(rpm)
+        self.rate = rpm / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """Take a token (possibly a future one); return seconds to wait for it."""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            return max(0.0, -self.tokens / self.rate)
+
+    def acquire(self):
+        delay = self._reserve()
+        if delay:
+            time.sleep(delay)
+
+    async def acquire_async(self):
+        delay = self._reserve()
+        if delay:
+            await asyncio.sleep(delay)
+
 
 class VLMExtractor:
     """
@@ -21,20 +279,62 @@ class VLMExtractor:
     Uses LangChain tools with VLM backend (via OpenRouter) for structured extraction.
     """
 
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        max_batch: Optional[int] = None,
+        max_wait: Optional[float] = None,
+        max_concurrent: Optional[int] = None
+    ):
         """
         Initialize VLM extractor.
 
         Args:
             api_key: OpenRouter API key (uses config if not provided)
+            max_batch: Regions collected before a batch is dispatched
+            max_wait: Seconds the oldest pending region may wait for a batch
+            max_concurrent: VLM requests kept in flight per batch
         """
         self.api_key = api_key or config.OPENROUTER_API_KEY
         self.base_url = config.OPENROUTER_BASE_URL
         self.vlm_model = config.VLM_MODEL
 
+        # Batching policy, applied by callers that stream regions in
+        self.max_batch = max_batch or config.VLM_BATCH_SIZE
+        self.max_wait = config.VLM_BATCH_MAX_WAIT if max_wait is None else max_wait
+        self.max_concurrent = max_concurrent or config.VLM_MAX_CONCURRENT
+
         if not self.api_key:
             logger.warning("OpenRouter API key not provided. VLM extraction will fail.")
 
+        # Requests are paced up front; retries are handled in _call_vlm*,
+        # so the SDK's own retry layer is switched off
+        self._limiter = _TokenBucket(config.VLM_RPM) if config.VLM_RPM > 0 else None
+
+        # One pooled client for the extractor's lifetime
+        self._http = httpx.Client(limits=_HTTP_LIMITS, timeout=_HTTP_TIMEOUT)
+        self.client = OpenAI(
+            api_key=self.api_key,
+            base_url=self.base_url,
+            http_client=self._http,
+            max_retries=0
+        )
+
+        # The async client is bound to the event loop it was created on,
+        # so it is created lazily per loop (see _get_async_client)
+        self._async_client: Optional[AsyncOpenAI] = None
+        self._async_loop: Optional[asyncio.AbstractEventLoop] = None
+
+        # Raw responses keyed by encoded image bytes + prompt; the model
+        # is the cache version, so switching models never reuses answers
+        self.cache = ResultCache(
+            config.CACHE_DIR, 'vlm_responses', version=self.vlm_model
+        ) if config.USE_PROCESSING_CACHE else None
+
+        # (region type, crop fingerprint) -> (exact pixel digest, extraction),
+        # most recent last
+        self._extracted: "OrderedDict[Tuple[str, bytes], Tuple[bytes, Dict[str, Any]]]" = OrderedDict()
+
         logger.info(f"VLM extractor initialized with model: {self.vlm_model}")
 
     def extract_table(
@@ -56,40 +356,60 @@ class VLMExtractor:
         """
         logger.debug(f"Extracting table from {region_id}")
 
-        # Create prompt for table extraction
-        prompt = """Analyze this table image and extract structured information.
+        try:
+            fmt, max_side = self._upload_params('table')
+            result = self._call_vlm(image, _TABLE_PROMPT, fmt=fmt, max_side=max_side)
+        except Exception as e:
+            return self._table_result(None, region_id, page_num, error=e)
+        return self._table_result(result, region_id, page_num)
 
-You MUST respond with ONLY a valid JSON object. Do not include any text before or after the JSON.
-Do not use markdown code blocks. Just return the raw JSON.
+    async def extract_table_async(
+        self,
+        image: Image.Image,
+        region_id: str,
+        page_num: int,
+        data: Optional[memoryview] = None
+    ) -> Dict[str, Any]:
+        """Async variant of extract_table; data is the image if already encoded."""
+        logger.debug(f"Extracting table from {region_id}")
 
-Return this exact structure:
-{
-    "headers": ["col1", "col2"],
-    "rows": [["val1", "val2"], ["val3", "val4"]],
-    "units": "description of units if any or empty string",
-    "footnotes": "any footnotes or empty string",
-    "summary": "brief description of what the table shows"
-}
+        try:
+            fmt, max_side = self._upload_params('table')
+            result = await self._call_vlm_async(
+                image, _TABLE_PROMPT, fmt=fmt, max_side=max_side, data=data
+            )
+        except Exception as e:
+            return self._table_result(None, region_id, page_num, error=e)
+        return self._table_result(result, region_id, page_num)
 
-Extract all visible data. If you cannot see the table clearly, return empty arrays for headers and rows.
-Respond with JSON only, no other text."""
+    def _table_result(
+        self,
+        result: Optional[str],
+        region_id: str,
+        page_num: int,
+        error: Optional[Exception] = None
+    ) -> Dict[str, Any]:
+        """
+        Parse a table response, or build the failure record.
 
+        Args:
+            result: Raw VLM response (None if the call failed)
+            region_id: Unique region identifier
+            page_num: Page number
+            error: Exception raised by the VLM call, if any
+
+        Returns:
+            Dictionary with structured table data
+        """
         try:
-            result = self._call_vlm(image, prompt)
+            if error is not None:
+                raise error
 
             # Clean response (remove markdown code blocks, extra text)
             cleaned_result = self._clean_json_response(result)
 
             # Parse JSON response
-            table_data = json.loads(cleaned_result)
-
-            # Validate required fields
-            if 'headers' not in table_data:
-                table_data['headers'] = []
-            if 'rows' not in table_data:
-                table_data['rows'] = []
-            if 'summary' not in table_data:
-                table_data['summary'] = ''
+            table_data = _conform(orjson.loads(cleaned_result), _TABLE_FIELDS)
 
             # Add metadata
             table_data['region_id'] = region_id
@@ -98,9 +418,9 @@ Respond with JSON only, no other text."""
 
             return table_data
 
-        except json.JSONDecodeError as e:
+        except orjson.JSONDecodeError as e:
             logger.error(f"Failed to parse JSON from {region_id}: {e}")
-            logger.debug(f"Raw response: {result[:200] if 'result' in locals() else 'N/A'}")
+            logger.debug(f"Raw response: {result[:200] if result else 'N/A'}")
             return {
                 'region_id': region_id,
                 'page_num': page_num,
@@ -141,42 +461,61 @@ Respond with JSON only, no other text."""
         """
         logger.debug(f"Extracting chart from {region_id}")
 
-        # Create prompt for chart extraction
-        prompt = """Analyze this chart/figure and extract key information.
+        try:
+            # Charts compress far better as JPEG; tables stay PNG for crisp text
+            fmt, max_side = self._upload_params('figure')
+            result = self._call_vlm(image, _CHART_PROMPT, fmt=fmt, max_side=max_side)
+        except Exception as e:
+            return self._chart_result(None, region_id, page_num, error=e)
+        return self._chart_result(result, region_id, page_num)
 
-You MUST respond with ONLY a valid JSON object. Do not include any text before or after the JSON.
-Do not use markdown code blocks. Just return the raw JSON.
+    async def extract_chart_async(
+        self,
+        image: Image.Image,
+        region_id: str,
+        page_num: int,
+        data: Optional[memoryview] = None
+    ) -> Dict[str, Any]:
+        """Async variant of extract_chart; data is the image if already encoded."""
+        logger.debug(f"Extracting chart from {region_id}")
 
-Return this exact structure:
-{
-    "chart_type": "bar/line/scatter/pie/diagram/other",
-    "title": "chart title if visible or empty string",
-    "x_axis": {"label": "x-axis label", "values": ["val1", "val2"]},
-    "y_axis": {"label": "y-axis label", "range": "min-max"},
-    "data_series": [{"name": "series1", "description": "what it shows"}],
-    "key_insights": ["insight1", "insight2"],
-    "trends": "description of visible trends",
-    "anomalies": "any notable anomalies or empty string",
-    "summary": "comprehensive description of what the chart shows"
-}
+        try:
+            fmt, max_side = self._upload_params('figure')
+            result = await self._call_vlm_async(
+                image, _CHART_PROMPT, fmt=fmt, max_side=max_side, data=data
+            )
+        except Exception as e:
+            return self._chart_result(None, region_id, page_num, error=e)
+        return self._chart_result(result, region_id, page_num)
 
-If you cannot clearly see certain elements, use empty strings or empty arrays.
-Respond with JSON only, no other text."""
+    def _chart_result(
+        self,
+        result: Optional[str],
+        region_id: str,
+        page_num: int,
+        error: Optional[Exception] = None
+    ) -> Dict[str, Any]:
+        """
+        Parse a chart response, or build the failure record.
+
+        Args:
+            result: Raw VLM response (None if the call failed)
+            region_id: Unique region identifier
+            page_num: Page number
+            error: Exception raised by the VLM call, if any
 
+        Returns:
+            Dictionary with structured chart data
+        """
         try:
-            result = self._call_vlm(image, prompt)
+            if error is not None:
+                raise error
 
             # Clean response (remove markdown code blocks, extra text)
             cleaned_result = self._clean_json_response(result)
 
             # Parse JSON response
-            chart_data = json.loads(cleaned_result)
-
-            # Validate required fields
-            if 'chart_type' not in chart_data:
-                chart_data['chart_type'] = 'unknown'
-            if 'summary' not in chart_data:
-                chart_data['summary'] = ''
+            chart_data = _conform(orjson.loads(cleaned_result), _CHART_FIELDS)
 
             # Add metadata
             chart_data['region_id'] = region_id
@@ -185,9 +524,9 @@ Respond with JSON only, no other text."""
 
             return chart_data
 
-        except json.JSONDecodeError as e:
+        except orjson.JSONDecodeError as e:
             logger.error(f"Failed to parse JSON from {region_id}: {e}")
-            logger.debug(f"Raw response: {result[:200] if 'result' in locals() else 'N/A'}")
+            logger.debug(f"Raw response: {result[:200] if result else 'N/A'}")
             return {
                 'region_id': region_id,
                 'page_num': page_num,
@@ -219,30 +558,146 @@ Respond with JSON only, no other text."""
         Returns:
             Cleaned JSON string
         """
-        import re
-
-        # Remove markdown code blocks
-        if '```json' in response:
-            # Extract content between ```json and ```
-            match = re.search(r'```json\s*(.*?)\s*```', response, re.DOTALL)
-            if match:
-                response = match.group(1)
-        elif '```' in response:
-            # Extract content between ``` and ```
-            match = re.search(r'```\s*(.*?)\s*```', response, re.DOTALL)
-            if match:
-                response = match.group(1)
-
-        # Find first { and last }
-        first_brace = response.find('{')
-        last_brace = response.rfind('}')
-
-        if first_brace != -1 and last_brace != -1 and last_brace > first_brace:
-            response = response[first_brace:last_brace + 1]
-
-        return response.strip()
-
-    def _call_vlm(self, image: Image.Image, prompt: str, max_retries: int = 3) -> str:
+        # Fast path: the prompt asks for bare JSON, which most responses are
+        stripped = response.strip()
+        if stripped.startswith('{') and stripped.endswith('}'):
+            return stripped
+
+        return _extract_json_span(stripped)
+
+    @staticmethod
+    def _upload_params(region_type: str) -> Tuple[str, int]:
+        """
+        Upload format and size cap for a region type.
+
+        Tables go as lossless PNG with extra resolution for small print;
+        charts and figures as JPEG.
+        """
+        if region_type == 'table':
+            return "PNG", config.VLM_TABLE_MAX_SIDE
+        return "JPEG", config.VLM_MAX_SIDE
+
+    @staticmethod
+    def _encode_image(
+        image: Image.Image,
+        fmt: str = "PNG",
+        max_side: Optional[int] = None
+    ) -> memoryview:
+        """
+        Encode an image for upload.
+
+        Images larger than the models' working resolution are downscaled
+        first, since extra pixels only cost upload bytes and input tokens.
+
+        Args:
+            image: PIL Image
+            fmt: "PNG" (lossless, for text-heavy tables) or "JPEG" (much
+                smaller for charts and figures)
+            max_side: Longest side to upload (default: config.VLM_MAX_SIDE)
+
+        Returns:
+            Encoded image, as a view of the encoder's buffer (no copy)
+        """
+        max_side = max_side or config.VLM_MAX_SIDE
+        if max(image.size) > max_side:
+            image = image.copy()
+            image.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
+
+        buffered = BytesIO()
+        if fmt == "JPEG":
+            if image.mode not in ("RGB", "L"):
+                image = image.convert("RGB")
+            image.save(buffered, format="JPEG", quality=85, optimize=True)
+        else:
+            # Fastest zlib level: a little larger, several times quicker
+            image.save(buffered, format="PNG", compress_level=1)
+        return buffered.getbuffer()
+
+    @staticmethod
+    def _build_messages(data: memoryview, prompt: str, fmt: str = "PNG") -> List[Dict[str, Any]]:
+        """
+        Build the chat messages for one VLM request.
+
+        The prompt comes before the image so requests share a stable
+        prefix that providers can cache.
+
+        Args:
+            data: Encoded image
+            prompt: Text prompt
+            fmt: Image format of data
+
+        Returns:
+            Messages for the chat completions API
+        """
+        # Base64 straight from the encoder's buffer into the data URL
+        image_url = f"data:image/{fmt.lower()};base64," + base64.b64encode(data).decode('ascii')
+
+        return [
+            {
+                "role": "user",
+                "content": [
+                    {
+                        "type": "text",
+                        "text": prompt
+                    },
+                    {
+                        "type": "image_url",
+                        "image_url": {
+                            "url": image_url
+                        }
+                    }
+                ]
+            }
+        ]
+
+    def _cached_response(self, data: memoryview, prompt: str) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Look up a previous response for the same image bytes and prompt.
+
+        Returns:
+            (cached response or None, cache key or None if caching is off)
+        """
+        if self.cache is None:
+            return None, None
+        cache_key = self.cache.key(data, prompt)
+        return self.cache.get(cache_key), cache_key
+
+    def _store_response(self, cache_key: Optional[str], response: str):
+        """Cache a response, unless it is not parseable JSON (worth retrying)."""
+        if cache_key is None:
+            return
+        try:
+            orjson.loads(self._clean_json_response(response))
+        except (orjson.JSONDecodeError, TypeError):
+            return
+        self.cache.set(cache_key, response)
+
+    @staticmethod
+    def _retry_delay(error: Exception, attempt: int, max_retries: int) -> Optional[float]:
+        """
+        Backoff before retrying a rate-limited (429) call.
+
+        Uses full jitter (a random wait up to 1, 2, 4, ... 30 seconds) so
+        concurrent requests that hit the limit together do not all retry
+        at the same moment.
+
+        Returns:
+            Seconds to wait, or None if the error should be raised
+        """
+        error_str = str(error)
+        if isinstance(error, RateLimitError) or '429' in error_str or 'rate limit' in error_str.lower():
+            if attempt < max_retries - 1:
+                return random.uniform(0, min(30, 2 ** attempt))
+        return None
+
+    def _call_vlm(
+        self,
+        image: Image.Image,
+        prompt: str,
+        max_retries: int = 5,
+        fmt: str = "PNG",
+        max_side: Optional[int] = None
+    ) -> str:
         """
         Call VLM API with image and prompt, with retry logic for rate limits.
 
@@ -250,111 +705,325 @@ Respond with JSON only, no other text."""
             image: PIL Image
             prompt: Text prompt
             max_retries: Maximum number of retry attempts
+            fmt: Upload format, "PNG" or "JPEG"
+            max_side: Longest side to upload (default: config.VLM_MAX_SIDE)
 
         Returns:
             VLM response text
         """
-        import time
+        data = self._encode_image(image, fmt, max_side)
+        cached, cache_key = self._cached_response(data, prompt)
+        if cached is not None:
+            return cached
+
+        messages = self._build_messages(data, prompt, fmt)
 
         for attempt in range(max_retries):
             try:
-                # Import OpenAI client here to avoid dependency issues
-                from openai import OpenAI
-
-                # Encode image to base64
-                buffered = BytesIO()
-                image.save(buffered, format="PNG")
-                img_str = base64.b64encode(buffered.getvalue()).decode()
-
-                # Initialize client
-                client = OpenAI(
-                    api_key=self.api_key,
-                    base_url=self.base_url
+                if self._limiter is not None:
+                    self._limiter.acquire()
+                response = self.client.chat.completions.create(
+                    model=self.vlm_model,
+                    messages=messages,
+                    temperature=0.1,
+                    max_tokens=2000
                 )
 
-                # Call VLM
-                response = client.chat.completions.create(
+                result = response.choices[0].message.content
+                self._store_response(cache_key, result)
+                return result
+
+            except Exception as e:
+                wait_time = self._retry_delay(e, attempt, max_retries)
+                if wait_time is not None:
+                    logger.warning(f"Rate limit hit, retrying in {wait_time:.1f}s (attempt {attempt + 1}/{max_retries})")
+                    time.sleep(wait_time)
+                    continue
+
+                logger.error(f"VLM API call failed: {e}")
+                raise
+
+        raise Exception(f"Failed after {max_retries} retries")
+
+    async def _call_vlm_async(
+        self,
+        image: Image.Image,
+        prompt: str,
+        max_retries: int = 5,
+        fmt: str = "PNG",
+        max_side: Optional[int] = None,
+        data: Optional[memoryview] = None
+    ) -> str:
+        """
+        Async variant of _call_vlm using AsyncOpenAI.
+
+        Image encoding runs in a worker thread so it overlaps with other
+        requests that are already in flight; callers that encoded ahead
+        pass the result as data.
+
+        Args:
+            image: PIL Image
+            prompt: Text prompt
+            max_retries: Maximum number of retry attempts
+            fmt: Upload format, "PNG" or "JPEG"
+            max_side: Longest side to upload (default: config.VLM_MAX_SIDE)
+            data: Image already encoded with fmt and max_side, if any
+
+        Returns:
+            VLM response text
+        """
+        if data is None:
+            data = await asyncio.to_thread(self._encode_image, image, fmt, max_side)
+        cached, cache_key = self._cached_response(data, prompt)
+        if cached is not None:
+            return cached
+
+        messages = self._build_messages(data, prompt, fmt)
+
+        for attempt in range(max_retries):
+            try:
+                if self._limiter is not None:
+                    await self._limiter.acquire_async()
+                response = await self._get_async_client().chat.completions.create(
                     model=self.vlm_model,
-                    messages=[
-                        {
-                            "role": "user",
-                            "content": [
-                                {
-                                    "type": "text",
-                                    "text": prompt
-                                },
-                                {
-                                    "type": "image_url",
-                                    "image_url": {
-                                        "url": f"data:image/png;base64,{img_str}"
-                                    }
-                                }
-                            ]
-                        }
-                    ],
+                    messages=messages,
                     temperature=0.1,
                     max_tokens=2000
                 )
 
-                return response.choices[0].message.content
+                result = response.choices[0].message.content
+                self._store_response(cache_key, result)
+                return result
 
             except Exception as e:
-                error_str = str(e)
-
-                # Check for rate limit error (429)
-                if '429' in error_str or 'rate limit' in error_str.lower():
-                    if attempt < max_retries - 1:
-                        wait_time = (2 ** attempt) * 2  # Exponential backoff: 2, 4, 8 seconds
-                        logger.warning(f"Rate limit hit, retrying in {wait_time}s (attempt {attempt + 1}/{max_retries})")
-                        time.sleep(wait_time)
-                        continue
+                wait_time = self._retry_delay(e, attempt, max_retries)
+                if wait_time is not None:
+                    logger.warning(f"Rate limit hit, retrying in {wait_time:.1f}s (attempt {attempt + 1}/{max_retries})")
+                    await asyncio.sleep(wait_time)
+                    continue
 
                 logger.error(f"VLM API call failed: {e}")
                 raise
 
         raise Exception(f"Failed after {max_retries} retries")
 
+    def _get_async_client(self) -> AsyncOpenAI:
+        """Return the pooled async client for the running event loop."""
+        loop = asyncio.get_running_loop()
+        if self._async_client is None or self._async_loop is not loop:
+            self._async_client = AsyncOpenAI(
+                api_key=self.api_key,
+                base_url=self.base_url,
+                http_client=httpx.AsyncClient(limits=_HTTP_LIMITS, timeout=_HTTP_TIMEOUT),
+                max_retries=0
+            )
+            self._async_loop = loop
+        return self._async_client
+
+    async def aclose(self):
+        """Close the async client's connections (before its loop ends)."""
+        if self._async_client is not None:
+            client, self._async_client, self._async_loop = self._async_client, None, None
+            await client.close()
+
+    def close(self):
+        """Close the pooled sync client's connections."""
+        self.client.close()
+
+    async def _run_and_close(self, coro):
+        """Run a coroutine, then close the async client bound to this loop."""
+        try:
+            return await coro
+        finally:
+            await self.aclose()
+
     def process_regions(
         self,
         regions: List[Dict[str, Any]],
-        images: Dict[int, Image.Image]
+        get_image: Callable[[int], Optional[PageImage]]
     ) -> Dict[str, Dict[str, Any]]:
         """
         Process multiple table/chart regions.
 
+        Pages are requested one at a time, so callers can decode them
+        lazily instead of holding every page of the document in memory.
+
         Args:
             regions: List of layout regions (filtered for tables/figures)
-            images: Dictionary mapping page_num to PIL Image
+            get_image: Callable returning the page (PIL Image or array) for a
+                page number, or None; a dict of pages is also accepted
 
         Returns:
             Dictionary mapping region_id to extracted structured data
         """
-        extracted_data = {}
-
-        for region in regions:
-            region_id = region['region_id']
-            region_type = region['region_type']
-            page_num = region['page_num']
-            bbox = region['bbox']
+        return asyncio.run(self._run_and_close(self.process_regions_async(regions, get_image)))
 
-            if page_num not in images:
+    async def process_regions_async(
+        self,
+        regions: List[Dict[str, Any]],
+        get_image: Callable[[int], Optional[PageImage]]
+    ) -> Dict[str, Dict[str, Any]]:
+        """Async variant of process_regions."""
+        if isinstance(get_image, dict):
+            get_image = get_image.get
+
+        # Group by page so each page is fetched and decoded exactly once
+        by_page = defaultdict(list)
+        for index, region in enumerate(regions):
+            if region['region_type'] in ('table', 'figure'):
+                by_page[region['page_num']].append(index)
+
+        crops = {}
+        for page_num, indices in by_page.items():
+            image = get_image(page_num)
+            if image is None:
                 logger.warning(f"Image not found for page {page_num}")
                 continue
+            if isinstance(image, Image.Image):
+                image.load()
+
+            for index in indices:
+                crops[index] = crop_region(image, regions[index]['bbox'])
 
-            # Crop region from image
-            image = images[page_num]
-            x1, y1, x2, y2 = map(int, bbox)
-            cropped = image.crop((x1, y1, x2, y2))
-
-            # Extract based on type
-            if region_type == 'table':
-                data = self.extract_table(cropped, region_id, page_num)
-            elif region_type == 'figure':
-                data = self.extract_chart(cropped, region_id, page_num)
-            else:
+        # Keep the caller's region order
+        order = sorted(crops)
+        return await self.process_crops_async(
+            [regions[index] for index in order],
+            [crops[index] for index in order]
+        )
+
+    def process_crops(
+        self,
+        regions: List[Dict[str, Any]],
+        crops: List[PageImage]
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Process table/chart regions whose images are already cropped.
+
+        Callers that hold the page anyway (the document pipeline) crop
+        right there, so pages never need to be kept around for the VLM.
+
+        Args:
+            regions: List of table/figure layout regions
+            crops: Cropped region image (PIL or array) for each region
+
+        Returns:
+            Dictionary mapping region_id to extracted structured data
+        """
+        return asyncio.run(self._run_and_close(self.process_crops_async(regions, crops)))
+
+    async def process_crops_async(
+        self,
+        regions: List[Dict[str, Any]],
+        crops: List[PageImage]
+    ) -> Dict[str, Dict[str, Any]]:
+        """Async variant of process_crops."""
+        # fromarray shares the array's memory, so this copies nothing
+        images = [
+            Image.fromarray(cropped) if isinstance(cropped, np.ndarray) else cropped
+            for cropped in crops
+        ]
+        crops = list(crops)
+
+        thumbs = [_crop_thumbnail(image) for image in images]
+
+        # Layout misfires on blank areas are not worth a VLM request; they
+        # get no extraction, like regions the VLM was never asked about
+        if config.VLM_SKIP_BLANK:
+            keep = [i for i, thumb in enumerate(thumbs) if not _is_blank(thumb)]
+            if len(keep) < len(regions):
+                logger.info(f"Skipping {len(regions) - len(keep)} blank table/chart regions")
+                regions = [regions[i] for i in keep]
+                images = [images[i] for i in keep]
+                crops = [crops[i] for i in keep]
+                thumbs = [thumbs[i] for i in keep]
+
+        # Identical crops are extracted once; the region type is part of
+        # the key because tables and figures use different prompts. The
+        # thumbnail fingerprint only finds candidates: crops whose
+        # fingerprint is shared (in this call or with the memo) are told
+        # apart by an exact pixel digest, so look-alike tables never get
+        # each other's extractions
+        fingerprints = [
+            (region['region_type'], _crop_fingerprint(image.size, thumb))
+            for region, image, thumb in zip(regions, images, thumbs)
+        ]
+        counts = Counter(fingerprints)
+        digests = [
+            image_digest(cropped) if counts[fp] > 1 or fp in self._extracted else None
+            for fp, cropped in zip(fingerprints, crops)
+        ]
+
+        reused = {}
+        jobs = {}
+        for index, (fp, digest, region, image) in enumerate(zip(fingerprints, digests, regions, images)):
+            memo = self._extracted.get(fp)
+            if memo is not None and memo[0] == digest:
+                self._extracted.move_to_end(fp)
+                reused[index] = memo[1]
                 continue
+            key = (fp, digest)
+            if key not in jobs:
+                jobs[key] = (region['region_id'], region['region_type'], region['page_num'], image)
+
+        # The VLM is a remote API, so requests are I/O-bound: fan them all
+        # out, with at most max_concurrent in flight (provider rate limit).
+        # Up to two more regions are encoded ahead in worker threads while
+        # the requests are on the network, so a freed slot never waits for
+        # an encode.
+        semaphore = asyncio.Semaphore(self.max_concurrent)
+        lookahead = asyncio.Semaphore(self.max_concurrent + 2)
+
+        async def run(job):
+            async with lookahead:
+                fmt, max_side = self._upload_params(job[1])
+                data = await asyncio.to_thread(self._encode_image, job[3], fmt, max_side)
+                async with semaphore:
+                    return await self._extract_region_async(*job, data)
+
+        results = await asyncio.gather(*(run(job) for job in jobs.values()))
+        fresh = dict(zip(jobs, results))
 
-            extracted_data[region_id] = data
+        extracted_data = {}
+        for index, (fp, digest, region) in enumerate(zip(fingerprints, digests, regions)):
+            data = reused[index] if index in reused else fresh[(fp, digest)]
+            extracted_data[region['region_id']] = {
+                **data,
+                'region_id': region['region_id'],
+                'page_num': region['page_num']
+            }
 
-        logger.info(f"Processed {len(extracted_data)} table/chart regions")
+        # Failures are not remembered, so a later duplicate gets a retry.
+        # A crop sent to the VLM is hashed here at most once, which costs
+        # milliseconds against a request that takes seconds
+        first_index = {}
+        for index, key in enumerate(zip(fingerprints, digests)):
+            first_index.setdefault(key, index)
+        for (fp, digest), data in fresh.items():
+            if 'error' in data:
+                continue
+            if digest is None:
+                digest = image_digest(crops[first_index[(fp, digest)]])
+            self._extracted[fp] = (digest, data)
+            self._extracted.move_to_end(fp)
+        while len(self._extracted) > _EXTRACTED_MEMO_SIZE:
+            self._extracted.popitem(last=False)
+
+        logger.info(
+            f"Processed {len(extracted_data)} table/chart regions "
+            f"({len(extracted_data) - len(jobs)} duplicates reused)"
+        )
         return extracted_data
+
+    async def _extract_region_async(
+        self,
+        region_id: str,
+        region_type: str,
+        page_num: int,
+        cropped: Image.Image,
+        data: Optional[memoryview] = None
+    ) -> Dict[str, Any]:
+        """Extract a single cropped table or figure region."""
+        if region_type == 'table':
+            return await self.extract_table_async(cropped, region_id, page_num, data)
+        return await self.extract_chart_async(cropped, region_id, page_num, data)
@@ -1,17 +1,32 @@
 """
 Answer caching system for suggested questions.
 """
-import json
+import asyncio
 import logging
+import os
+import sqlite3
+import tempfile
+import threading
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Dict, Any, Optional
-from dataclasses import dataclass, asdict
+from typing import Dict, Any, Iterator, Optional
+from dataclasses import dataclass
 from datetime import datetime
 
+import orjson
+
 logger = logging.getLogger(__name__)
 
+# Markers of answers that recorded a failure instead of a real answer
+_ERROR_MARKERS = ('Error generating answer', 'Error code: 402')
+
+
+def _is_error_answer(answer: str) -> bool:
+    """Check whether an answer text is a recorded generation failure."""
+    return bool(answer) and any(marker in answer for marker in _ERROR_MARKERS)
 
-@dataclass
+
+@dataclass(slots=True)
 class CachedAnswer:
     """Cached answer with metadata."""
     question: str
@@ -21,14 +36,32 @@ class CachedAnswer:
     has_evidence: bool
     retrieval_stats: dict
     cached_at: str
+    is_error: bool = False  # computed once when cached; error answers are regenerated
 
     def to_dict(self) -> Dict[str, Any]:
-        """Convert to dictionary."""
-        return asdict(self)
+        """
+        Convert to dictionary.
+
+        Built by hand rather than with asdict(), which deep-copies the
+        evidence lists; the result shares them and is only serialized.
+        """
+        return {
+            'question': self.question,
+            'answer': self.answer,
+            'evidence': self.evidence,
+            'sources': self.sources,
+            'has_evidence': self.has_evidence,
+            'retrieval_stats': self.retrieval_stats,
+            'cached_at': self.cached_at,
+            'is_error': self.is_error
+        }
 
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'CachedAnswer':
         """Create from dictionary."""
+        if 'is_error' not in data:
+            # Entries cached before the flag existed
+            data = {**data, 'is_error': _is_error_answer(data.get('answer', ''))}
         return cls(**data)
 
 
@@ -38,6 +71,13 @@ class AnswerCache:
 
     This allows the app to instantly display answers for common questions
     without calling the LLM, improving response time and reducing API costs.
+
+    Answers are stored one row per question in SQLite, next to the JSON
+    file, so writes touch a single row and nothing is held in memory. The
+    JSON file (shipped with the repo) stays the source of truth: the
+    database is reloaded from it whenever it changes or is deleted, and
+    update_all/update_all_async/clear write it back. Answers cached by
+    set() alone live in the local database until the next export.
     """
 
     def __init__(self, cache_file: Path):
@@ -45,48 +85,155 @@ class AnswerCache:
         Initialize cache manager.
 
         Args:
-            cache_file: Path to cache JSON file
+            cache_file: Path to cache JSON file; the database is stored
+                alongside it with a .db suffix
         """
         self.cache_file = cache_file
-        self.cache: Dict[str, CachedAnswer] = {}
-        self._load_cache()
+        self.db_file = cache_file.with_suffix('.db')
+        self.db_file.parent.mkdir(parents=True, exist_ok=True)
+
+        # Streamlit shares one cache across script threads; the lock
+        # serializes use of the single connection
+        self._lock = threading.RLock()
+        self._batch_depth = 0
+        self.conn = sqlite3.connect(
+            self.db_file,
+            isolation_level=None,
+            check_same_thread=False
+        )
+        # WAL lets readers proceed while update_all is writing
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS answers("
+            "question TEXT PRIMARY KEY, payload BLOB, cached_at TEXT)"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS meta(key TEXT PRIMARY KEY, value TEXT)"
+        )
+        self._sync_json()
 
-    def _load_cache(self):
-        """Load cache from disk."""
-        if self.cache_file.exists():
-            try:
-                with open(self.cache_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    self.cache = {
-                        q: CachedAnswer.from_dict(a)
-                        for q, a in data.items()
-                    }
-                logger.info(f"Loaded {len(self.cache)} cached answers")
-            except Exception as e:
-                logger.error(f"Failed to load cache: {e}")
-                self.cache = {}
-        else:
-            logger.info("No cache file found, starting fresh")
-            self.cache = {}
-
-    def _save_cache(self):
-        """Save cache to disk."""
+        logger.info(f"Answer cache has {self._count()} cached answers")
+
+    def _json_mtime(self) -> Optional[str]:
         try:
-            # Ensure directory exists
-            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            return str(self.cache_file.stat().st_mtime_ns)
+        except FileNotFoundError:
+            return None
+
+    def _get_meta(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return None if row is None else row[0]
+
+    def _set_meta(self, key: str, value: Optional[str]):
+        with self._lock:
+            if value is None:
+                self.conn.execute("DELETE FROM meta WHERE key = ?", (key,))
+            else:
+                self.conn.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)", (key, value))
+
+    def _sync_json(self):
+        """
+        Reload the database from the JSON cache file if it changed.
 
-            # Convert to JSON-serializable format
-            data = {
-                q: a.to_dict()
-                for q, a in self.cache.items()
-            }
+        The file's mtime is recorded on every import and export; a file
+        whose mtime differs replaces the database contents, and a file
+        deleted since the last sync clears them.
+        """
+        synced = self._get_meta('json_mtime')
+        current = self._json_mtime()
+        if current == synced:
+            return
+
+        if current is None:
+            with self.batch():
+                self.conn.execute("DELETE FROM answers")
+                self._set_meta('json_mtime', None)
+            logger.info(f"{self.cache_file} was removed, cleared cached answers")
+            return
 
-            with open(self.cache_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
+        try:
+            data = orjson.loads(self.cache_file.read_bytes())
+            with self.batch():
+                self.conn.execute("DELETE FROM answers")
+                for question, answer in data.items():
+                    self._put(question, CachedAnswer.from_dict(answer))
+                self._set_meta('json_mtime', current)
+            logger.info(f"Imported {len(data)} cached answers from {self.cache_file}")
+        except Exception as e:
+            logger.error(f"Failed to import cache file: {e}")
 
-            logger.info(f"Saved {len(self.cache)} cached answers")
+    def export_json(self):
+        """Write every cached answer back to the JSON cache file."""
+        try:
+            with self._lock:
+                data = {
+                    question: orjson.loads(payload)
+                    for question, payload in self.conn.execute(
+                        "SELECT question, payload FROM answers"
+                    )
+                }
+
+            # Write to a temp file and rename so a crash never leaves a
+            # truncated cache behind
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_file.parent, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+                os.replace(tmp_path, self.cache_file)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+
+            self._set_meta('json_mtime', self._json_mtime())
+            logger.info(f"Saved {len(data)} cached answers to {self.cache_file}")
         except Exception as e:
-            logger.error(f"Failed to save cache: {e}")
+            logger.error(f"Failed to save cache file: {e}")
+
+    def _count(self) -> int:
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM answers").fetchone()[0]
+
+    def _put(self, question: str, cached_answer: CachedAnswer):
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO answers VALUES (?, ?, ?)",
+                (question, orjson.dumps(cached_answer.to_dict()), cached_answer.cached_at)
+            )
+
+    @contextmanager
+    def batch(self) -> Iterator['AnswerCache']:
+        """
+        Run a block of database writes as one transaction.
+
+        The connection stays locked for the whole block, so other threads
+        can neither interleave with it nor be rolled back along with it;
+        keep it to database work, never LLM calls. Batches may be nested;
+        the outermost one commits (or rolls back if the block raises).
+        """
+        with self._lock:
+            if self._batch_depth == 0:
+                self.conn.execute("BEGIN")
+            self._batch_depth += 1
+            try:
+                yield self
+            except BaseException:
+                self._end_batch("ROLLBACK")
+                raise
+            self._end_batch("COMMIT")
+
+    def _end_batch(self, statement: str):
+        self._batch_depth -= 1
+        if self._batch_depth == 0:
+            self.conn.execute(statement)
+
+    def _lookup(self, question: str) -> Optional[CachedAnswer]:
+        """Read a question's row, whether or not it is an error answer."""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT payload FROM answers WHERE question = ?", (question,)
+            ).fetchone()
+        return None if row is None else CachedAnswer.from_dict(orjson.loads(row[0]))
 
     def get(self, question: str) -> Optional[CachedAnswer]:
         """
@@ -98,13 +245,12 @@ class AnswerCache:
         Returns:
             Cached answer if exists and valid, None otherwise
         """
-        cached_answer = self.cache.get(question)
+        cached_answer = self._lookup(question)
 
         # Check if answer contains errors
-        if cached_answer and cached_answer.answer:
-            if 'Error generating answer' in cached_answer.answer or 'Error code: 402' in cached_answer.answer:
-                logger.warning(f"Cached answer for '{question[:50]}...' contains error, will regenerate")
-                return None
+        if cached_answer is not None and cached_answer.is_error:
+            logger.warning(f"Cached answer for '{question[:50]}...' contains error, will regenerate")
+            return None
 
         return cached_answer
 
@@ -118,15 +264,8 @@ class AnswerCache:
         Returns:
             True if cached and valid, False otherwise
         """
-        if question not in self.cache:
-            return False
-
-        # Check if cached answer is valid (not an error message)
-        cached_answer = self.cache[question]
-        if 'Error generating answer' in cached_answer.answer or 'Error code: 402' in cached_answer.answer:
-            return False
-
-        return True
+        cached_answer = self._lookup(question)
+        return cached_answer is not None and not cached_answer.is_error
 
     def set(self, question: str, answer_obj: Any):
         """
@@ -143,11 +282,11 @@ class AnswerCache:
             sources=answer_obj.sources,
             has_evidence=answer_obj.has_evidence,
             retrieval_stats=answer_obj.retrieval_stats,
-            cached_at=datetime.now().isoformat()
+            cached_at=datetime.now().isoformat(),
+            is_error=_is_error_answer(answer_obj.answer)
         )
 
-        self.cache[question] = cached_answer
-        self._save_cache()
+        self._put(question, cached_answer)
         logger.info(f"Cached answer for: {question[:50]}...")
 
     def update_all(self, questions: list, answer_engine: Any, **kwargs):
@@ -174,23 +313,78 @@ class AnswerCache:
                     **kwargs
                 )
 
-                # Cache it
+                # Cache it; each answer commits on its own so no write
+                # transaction is held across LLM calls
                 self.set(question, answer)
 
             except Exception as e:
                 logger.error(f"Failed to cache question '{question}': {e}")
 
+        self.export_json()
+        logger.info("Cache update complete")
+
+    async def update_all_async(
+        self,
+        questions: list,
+        answer_engine: Any,
+        *,
+        concurrency: int = 8,
+        **kwargs
+    ):
+        """
+        Update cache for all suggested questions, several at a time.
+
+        Each answer takes seconds of LLM time, so questions are answered
+        concurrently and each one is cached as soon as it completes.
+
+        Args:
+            questions: List of questions to cache
+            answer_engine: AnswerEngine instance; answer_question_async is
+                used if it has one, otherwise answer_question runs in
+                worker threads
+            concurrency: Maximum questions in flight
+            **kwargs: Additional arguments for answer_question
+        """
+        logger.info(f"Updating cache for {len(questions)} questions ({concurrency} at a time)...")
+        semaphore = asyncio.Semaphore(concurrency)
+        answer_async = getattr(answer_engine, 'answer_question_async', None)
+
+        async def answer_one(question: str):
+            async with semaphore:
+                try:
+                    if answer_async is not None:
+                        answer = await answer_async(question=question, **kwargs)
+                    else:
+                        answer = await asyncio.to_thread(
+                            answer_engine.answer_question, question=question, **kwargs
+                        )
+                except Exception as e:
+                    logger.error(f"Failed to cache question '{question}': {e}")
+                    answer = None
+            return question, answer
+
+        tasks = [asyncio.create_task(answer_one(question)) for question in questions]
+        for i, next_done in enumerate(asyncio.as_completed(tasks), 1):
+            question, answer = await next_done
+            if answer is not None:
+                self.set(question, answer)
+            logger.info(f"Finished {i}/{len(questions)}: {question[:50]}...")
+
+        self.export_json()
         logger.info("Cache update complete")
 
     def clear(self):
         """Clear all cached answers."""
-        self.cache = {}
-        self._save_cache()
+        with self._lock:
+            self.conn.execute("DELETE FROM answers")
+        self.export_json()
         logger.info("Cache cleared")
 
     def get_stats(self) -> Dict[str, Any]:
         """Get cache statistics."""
+        with self._lock:
+            questions = [row[0] for row in self.conn.execute("SELECT question FROM answers")]
         return {
-            'total_cached': len(self.cache),
-            'questions': list(self.cache.keys())
+            'total_cached': len(questions),
+            'questions': questions
         }
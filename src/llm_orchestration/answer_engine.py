@@ -1,11 +1,17 @@
 """
 Answer synthesis engine using LangChain and OpenRouter.
 """
+import asyncio
+import hashlib
 import logging
 import json
+import threading
+import time
+from collections import OrderedDict
 from pathlib import Path
-from typing import Dict, Any, List, Optional
-from dataclasses import dataclass
+from typing import Dict, Any, Iterator, List, Optional, Tuple, Union
+from dataclasses import dataclass, field
+from functools import lru_cache
 
 from langchain_openai import ChatOpenAI
 from langchain_core.messages import HumanMessage, SystemMessage
@@ -15,16 +21,197 @@ from ..config import config
 
 logger = logging.getLogger(__name__)
 
+# One evidence passage in the LLM context
+_EVIDENCE_TEMPLATE = (
+    "[Evidence {}]\n"
+    "Paper: {}\n"
+    "Topic: {}\n"
+    "Source: {}, Page {}\n"
+    "Region Type: {}\n"
+    "Content:\n{}\n"
+)
+
+# User turn of an evidence-backed answer request
+_HUMAN_TEMPLATE = (
+    "Evidence passages:\n\n{context}\n\n"
+    "Question: {question}\n\n"
+    "Please provide an evidence-backed answer following the format specified."
+)
+
+# OpenRouter providers that only cache prompt prefixes marked with
+# cache_control; others (OpenAI, DeepSeek, ...) cache repeated prefixes
+# automatically
+_EXPLICIT_CACHE_PROVIDERS = ('anthropic/', 'google/')
+
+# Topic shown for papers missing from paper_metadata.json
+_DEFAULT_TOPIC = 'General Research'
+
+
+@lru_cache(maxsize=1)
+def _install_llm_cache():
+    """
+    Install LangChain's process-wide SQLite cache of LLM completions.
+
+    LangChain consults it inside invoke/batch, so exact-match prompts are
+    answered from disk across restarts and worker processes. Runs once
+    per process.
+    """
+    try:
+        from langchain_community.cache import SQLiteCache
+        from langchain_core.globals import set_llm_cache
+
+        config.CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        database_path = config.CACHE_DIR / 'llm_cache.db'
+        set_llm_cache(SQLiteCache(database_path=str(database_path)))
+        logger.info(f"LLM completion cache: {database_path}")
+    except Exception as e:
+        logger.warning(f"Persistent LLM cache unavailable: {e}")
+
 
 @dataclass
 class Answer:
-    """Container for answer with evidence."""
+    """
+    Container for answer with evidence.
+
+    Evidence is kept as the raw chunks; the display dicts in `evidence`
+    are built on first access, so callers that only read the answer text
+    never pay for formatting.
+    """
     question: str
     answer: str
-    evidence: List[Dict[str, Any]]
+    evidence_chunks: List[Evidence]
     sources: List[str]
     has_evidence: bool
     retrieval_stats: Dict[str, Any]
+    _evidence: Optional[List[Dict[str, Any]]] = field(default=None, repr=False, compare=False)
+
+    @property
+    def evidence(self) -> List[Dict[str, Any]]:
+        """Evidence formatted for display, in retrieval order."""
+        if self._evidence is None:
+            self._evidence = [
+                RAGRetriever.format_evidence_for_display(ev) for ev in self.evidence_chunks
+            ]
+        return self._evidence
+
+    @classmethod
+    def from_formatted(cls, evidence: List[Dict[str, Any]], **kwargs) -> 'Answer':
+        """
+        Rebuild an answer whose evidence is only available formatted.
+
+        Args:
+            evidence: Display-formatted evidence (e.g. from the answer cache)
+            **kwargs: The remaining Answer fields
+
+        Returns:
+            Answer object
+        """
+        return cls(evidence_chunks=[], _evidence=evidence, **kwargs)
+
+
+class StreamingAnswer:
+    """
+    Answer whose text arrives as a token stream.
+
+    Iterate it to receive the answer text as it is generated; once the
+    stream is exhausted, `answer` holds the complete Answer.
+    """
+
+    def __init__(self, answer: Answer, tokens: Iterator[str]):
+        """
+        Initialize streaming answer.
+
+        Args:
+            answer: Answer with evidence and sources; its text is filled in
+                when the stream completes
+            tokens: Answer text chunks
+        """
+        self.answer = answer
+        self._tokens = tokens
+
+    def __iter__(self) -> Iterator[str]:
+        parts = []
+        for token in self._tokens:
+            parts.append(token)
+            yield token
+        self.answer.answer = "".join(parts)
+
+
+class SmartAnswerCache:
+    """
+    In-memory LRU cache of generated answers, with a time-to-live.
+
+    Asking the same question over the same evidence (a repeated question,
+    or a rerun after a page reload) then skips the LLM round-trip, which
+    dominates answer latency.
+    """
+
+    def __init__(self, max_entries: int = 512, ttl_seconds: float = 3600):
+        """
+        Initialize cache.
+
+        Args:
+            max_entries: Answers kept; the least recently used go first
+            ttl_seconds: Age after which an answer is regenerated
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        # Streamlit sessions share one engine across threads
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(*parts: str) -> str:
+        """Build a cache key from the prompt parts."""
+        return hashlib.sha256("\x00".join(parts).encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Look up an answer.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Cached answer, or None on a miss or if it has expired
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] < self.ttl_seconds:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def set(self, key: str, answer: str):
+        """
+        Store an answer.
+
+        Args:
+            key: Cache key
+            answer: Generated answer
+        """
+        with self._lock:
+            self._entries[key] = (time.monotonic(), answer)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get cache statistics."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
 
 
 class AnswerEngine:
@@ -58,7 +245,17 @@ class AnswerEngine:
         # Load paper metadata
         self.paper_metadata = self._load_paper_metadata()
 
+        # Flat (title, topic) per paper; papers without an entry use their
+        # filename as title and the default topic
+        self._meta_table: Dict[str, Tuple[str, str]] = {
+            name: (meta.get('title', name), meta.get('topic', _DEFAULT_TOPIC))
+            for name, meta in self.paper_metadata.items()
+        }
+
         # Initialize LLM
+        if config.LLM_PERSISTENT_CACHE:
+            _install_llm_cache()
+
         self.llm = ChatOpenAI(
             model=self.model,
             openai_api_key=self.api_key,
@@ -98,6 +295,24 @@ Then, after your answer is complete, add:
 - [Paper Title] (Topic: [Topic]) - Pages referenced
 [List all unique papers used]
 """
+        # Shared by every request instead of being rebuilt per call. It is
+        # the first, unchanging part of every prompt, so provider prefix
+        # caching can skip its prefill; providers that need an explicit
+        # marker get one
+        if self.model.startswith(_EXPLICIT_CACHE_PROVIDERS):
+            self._system_msg = SystemMessage(content=[{
+                "type": "text",
+                "text": self.system_prompt,
+                "cache_control": {"type": "ephemeral"}
+            }])
+        else:
+            self._system_msg = SystemMessage(content=self.system_prompt)
+
+        # Answers for repeated question + evidence combinations
+        self.answer_cache = SmartAnswerCache(
+            max_entries=config.LLM_CACHE_MAX_ENTRIES,
+            ttl_seconds=config.LLM_CACHE_TTL
+        ) if config.LLM_CACHE_TTL > 0 else None
 
         logger.info(f"Answer engine initialized with model: {self.model}")
 
@@ -120,8 +335,9 @@ Then, after your answer is complete, add:
         question: str,
         top_k: int = None,
         filter_papers: Optional[List[str]] = None,
-        filter_region_types: Optional[List[str]] = None
-    ) -> Answer:
+        filter_region_types: Optional[List[str]] = None,
+        stream: bool = False
+    ) -> Union[Answer, StreamingAnswer]:
         """
         Answer a question with evidence backing.
 
@@ -130,9 +346,12 @@ Then, after your answer is complete, add:
             top_k: Number of evidence chunks to retrieve
             filter_papers: Optional paper filter
             filter_region_types: Optional region type filter
+            stream: Return a StreamingAnswer that yields the answer text as
+                the LLM generates it, instead of waiting for the full answer
 
         Returns:
-            Answer object with evidence and sources
+            Answer object with evidence and sources, or a StreamingAnswer
+            wrapping one if stream is set
         """
         logger.info(f"Answering question: {question[:100]}...")
 
@@ -145,38 +364,161 @@ Then, after your answer is complete, add:
         )
 
         if not retrieval_result.evidence_chunks:
-            return Answer(
-                question=question,
-                answer="No relevant evidence found in the indexed papers.",
-                evidence=[],
-                sources=[],
-                has_evidence=False,
-                retrieval_stats={
-                    'total_chunks': 0,
-                    'papers_searched': []
-                }
-            )
+            answer = self._no_evidence_answer(question)
+            return StreamingAnswer(answer, iter((answer.answer,))) if stream else answer
 
         # Step 2: Format context for LLM
         context = self._format_context(retrieval_result)
 
+        if stream:
+            answer = self._build_answer(question, retrieval_result, "")
+            return StreamingAnswer(answer, self._generate_answer_stream(question, context))
+
         # Step 3: Generate answer
         answer_text = self._generate_answer(question, context)
 
-        # Step 4: Format evidence for response
-        evidence_list = [
-            self.retriever.format_evidence_for_display(ev)
-            for ev in retrieval_result.evidence_chunks
+        answer = self._build_answer(question, retrieval_result, answer_text)
+        logger.info("Answer generated successfully")
+        return answer
+
+    async def answer_question_async(
+        self,
+        question: str,
+        top_k: int = None,
+        filter_papers: Optional[List[str]] = None,
+        filter_region_types: Optional[List[str]] = None
+    ) -> Answer:
+        """
+        Async variant of answer_question.
+
+        Retrieval runs in a worker thread and the LLM call is awaited, so
+        one event loop can have many questions in flight.
+
+        Args:
+            question: User question
+            top_k: Number of evidence chunks to retrieve
+            filter_papers: Optional paper filter
+            filter_region_types: Optional region type filter
+
+        Returns:
+            Answer object with evidence and sources
+        """
+        logger.info(f"Answering question: {question[:100]}...")
+
+        retrieval_result = await self.retriever.aretrieve(
+            query=question,
+            top_k=top_k,
+            filter_papers=filter_papers,
+            filter_region_types=filter_region_types
+        )
+
+        if not retrieval_result.evidence_chunks:
+            return self._no_evidence_answer(question)
+
+        context = self._format_context(retrieval_result)
+        answer_text = await self._generate_answer_async(question, context)
+
+        answer = self._build_answer(question, retrieval_result, answer_text)
+        logger.info("Answer generated successfully")
+        return answer
+
+    def answer_questions_batch(
+        self,
+        questions: List[str],
+        top_k: int = None,
+        max_concurrency: int = 8
+    ) -> List[Answer]:
+        """
+        Answer several questions, with their LLM calls in flight together.
+
+        Retrieval runs locally per question; the LLM calls, which dominate
+        the time and are I/O-bound, go out through ChatOpenAI.batch.
+
+        Args:
+            questions: User questions
+            top_k: Number of evidence chunks to retrieve per question
+            max_concurrency: Maximum LLM requests in flight
+
+        Returns:
+            Answer objects, in the order of questions
+        """
+        logger.info(f"Answering {len(questions)} questions in a batch...")
+
+        retrievals = [
+            self.retriever.retrieve(query=question, top_k=top_k)
+            for question in questions
+        ]
+
+        answer_texts: List[Optional[str]] = [None] * len(questions)
+        pending = []  # (index, cache key, messages)
+        for i, (question, retrieval_result) in enumerate(zip(questions, retrievals)):
+            if not retrieval_result.evidence_chunks:
+                continue
+            context = self._format_context(retrieval_result)
+            answer_texts[i], cache_key = self._cached_answer(question, context)
+            if answer_texts[i] is None:
+                pending.append((i, cache_key, self._build_messages(question, context)))
+
+        if pending:
+            responses = self.llm.batch(
+                [messages for _, _, messages in pending],
+                config={"max_concurrency": max_concurrency},
+                return_exceptions=True
+            )
+            for (i, cache_key, _), response in zip(pending, responses):
+                if isinstance(response, Exception):
+                    logger.error(f"Failed to generate answer: {response}")
+                    answer_texts[i] = f"Error generating answer: {str(response)}"
+                    continue
+                answer_texts[i] = response.content
+                if cache_key is not None:
+                    self.answer_cache.set(cache_key, response.content)
+
+        return [
+            self._build_answer(question, retrieval_result, answer_text)
+            if retrieval_result.evidence_chunks else self._no_evidence_answer(question)
+            for question, retrieval_result, answer_text in zip(questions, retrievals, answer_texts)
         ]
 
-        # Step 5: Extract unique sources
+    @staticmethod
+    def _no_evidence_answer(question: str) -> Answer:
+        """Answer returned when retrieval finds nothing."""
+        return Answer(
+            question=question,
+            answer="No relevant evidence found in the indexed papers.",
+            evidence_chunks=[],
+            sources=[],
+            has_evidence=False,
+            retrieval_stats={
+                'total_chunks': 0,
+                'papers_searched': []
+            }
+        )
+
+    def _build_answer(
+        self,
+        question: str,
+        retrieval_result: RetrievalResult,
+        answer_text: str
+    ) -> Answer:
+        """
+        Package a generated answer with its evidence and sources.
+
+        Args:
+            question: User question
+            retrieval_result: Evidence the answer was generated from
+            answer_text: Generated answer
+
+        Returns:
+            Answer object
+        """
+        # Extract unique sources
         sources = self._extract_sources(retrieval_result.evidence_chunks)
 
-        # Create answer object
-        answer = Answer(
+        return Answer(
             question=question,
             answer=answer_text,
-            evidence=evidence_list,
+            evidence_chunks=retrieval_result.evidence_chunks,
             sources=sources,
             has_evidence=True,
             retrieval_stats={
@@ -193,9 +535,6 @@ Then, after your answer is complete, add:
             }
         )
 
-        logger.info("Answer generated successfully")
-        return answer
-
     def _format_context(self, retrieval_result: RetrievalResult) -> str:
         """
         Format retrieval results as context for LLM.
@@ -206,29 +545,27 @@ Then, after your answer is complete, add:
         Returns:
             Formatted context string
         """
-        context_parts = []
-
-        for i, evidence in enumerate(retrieval_result.evidence_chunks, 1):
-            # Get paper metadata
-            paper_meta = self.paper_metadata.get(evidence.paper_name, {})
-            paper_topic = paper_meta.get('topic', 'Unknown Topic')
-            paper_title = paper_meta.get('title', evidence.paper_name)
-
-            context_parts.append(
-                f"[Evidence {i}]\n"
-                f"Paper: {paper_title}\n"
-                f"Topic: {paper_topic}\n"
-                f"Source: {evidence.paper_name}, Page {evidence.page_num}\n"
-                f"Region Type: {evidence.region_type}\n"
-                f"Content:\n{evidence.text}\n"
+        meta_table = self._meta_table
+        return "\n".join(
+            _EVIDENCE_TEMPLATE.format(
+                i,
+                *meta_table.get(evidence.paper_name, (evidence.paper_name, _DEFAULT_TOPIC)),
+                evidence.paper_name,
+                evidence.page_num,
+                evidence.region_type,
+                evidence.text
             )
-
-        return "\n".join(context_parts)
+            for i, evidence in enumerate(retrieval_result.evidence_chunks, 1)
+        )
 
     def _generate_answer(self, question: str, context: str) -> str:
         """
         Generate answer using LLM.
 
+        Answers are cached on model, system prompt, question and the
+        formatted context. The context covers the evidence chunks in
+        order, so cached [Evidence N] citations still match the evidence.
+
         Args:
             question: User question
             context: Formatted evidence context
@@ -236,27 +573,111 @@ Then, after your answer is complete, add:
         Returns:
             Generated answer
         """
-        # Create prompt
-        messages = [
-            SystemMessage(content=self.system_prompt),
-            HumanMessage(
-                content=f"Evidence passages:\n\n{context}\n\n"
-                        f"Question: {question}\n\n"
-                        "Please provide an evidence-backed answer following the format specified."
-            )
-        ]
+        cached, cache_key = self._cached_answer(question, context)
+        if cached is not None:
+            logger.info("Answer served from cache")
+            return cached
+
+        messages = self._build_messages(question, context)
 
         try:
             # Generate answer
             response = self.llm.invoke(messages)
             answer = response.content
 
+            if cache_key is not None:
+                self.answer_cache.set(cache_key, answer)
+            return answer
+
+        except Exception as e:
+            logger.error(f"Failed to generate answer: {e}")
+            return f"Error generating answer: {str(e)}"
+
+    async def _generate_answer_async(self, question: str, context: str) -> str:
+        """
+        Async variant of _generate_answer, sharing its cache.
+
+        Args:
+            question: User question
+            context: Formatted evidence context
+
+        Returns:
+            Generated answer
+        """
+        cached, cache_key = self._cached_answer(question, context)
+        if cached is not None:
+            logger.info("Answer served from cache")
+            return cached
+
+        messages = self._build_messages(question, context)
+
+        try:
+            response = await self.llm.ainvoke(messages)
+            answer = response.content
+
+            if cache_key is not None:
+                self.answer_cache.set(cache_key, answer)
             return answer
 
         except Exception as e:
             logger.error(f"Failed to generate answer: {e}")
             return f"Error generating answer: {str(e)}"
 
+    def _generate_answer_stream(self, question: str, context: str) -> Iterator[str]:
+        """
+        Generate answer using LLM, yielding text as it arrives.
+
+        Shares the answer cache with _generate_answer; a cached answer is
+        yielded in one piece.
+
+        Args:
+            question: User question
+            context: Formatted evidence context
+
+        Yields:
+            Answer text chunks
+        """
+        cached, cache_key = self._cached_answer(question, context)
+        if cached is not None:
+            logger.info("Answer served from cache")
+            yield cached
+            return
+
+        messages = self._build_messages(question, context)
+
+        parts = []
+        try:
+            for chunk in self.llm.stream(messages):
+                parts.append(chunk.content)
+                yield chunk.content
+        except Exception as e:
+            logger.error(f"Failed to generate answer: {e}")
+            separator = "\n\n" if parts else ""
+            yield f"{separator}Error generating answer: {str(e)}"
+            return
+
+        if cache_key is not None:
+            self.answer_cache.set(cache_key, "".join(parts))
+
+    def _cached_answer(self, question: str, context: str) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Look up a previous answer for the same question and context.
+
+        Returns:
+            (cached answer or None, cache key or None if caching is off)
+        """
+        if self.answer_cache is None:
+            return None, None
+        cache_key = self.answer_cache.key(self.model, self.system_prompt, question, context)
+        return self.answer_cache.get(cache_key), cache_key
+
+    def _build_messages(self, question: str, context: str) -> list:
+        """Build the chat messages for one evidence-backed answer."""
+        return [
+            self._system_msg,
+            HumanMessage(content=_HUMAN_TEMPLATE.format(context=context, question=question))
+        ]
+
     def _extract_sources(self, evidence_chunks: List[Evidence]) -> List[str]:
         """
         Extract unique source citations from evidence with paper topics.
@@ -271,12 +692,12 @@ Then, after your answer is complete, add:
         papers = {}
         for evidence in evidence_chunks:
             if evidence.paper_name not in papers:
-                paper_meta = self.paper_metadata.get(evidence.paper_name, {})
-                paper_title = paper_meta.get('title', evidence.paper_name)
-                paper_topic = paper_meta.get('topic', 'General Research')
+                title, topic = self._meta_table.get(
+                    evidence.paper_name, (evidence.paper_name, _DEFAULT_TOPIC)
+                )
                 papers[evidence.paper_name] = {
-                    'title': paper_title,
-                    'topic': paper_topic,
+                    'title': title,
+                    'topic': topic,
                     'pages': set()
                 }
             papers[evidence.paper_name]['pages'].add(evidence.page_num)
@@ -350,6 +771,16 @@ Then, after your answer is complete, add:
                     intermediate_answer
                 )
 
+        # Hops often retrieve the same chunks; keep each once (at its best
+        # score) and cap the total to bound the synthesis prompt
+        best_by_chunk: Dict[str, Evidence] = {}
+        for ev in all_evidence:
+            kept = best_by_chunk.get(ev.chunk_id)
+            if kept is None or ev.score > kept.score:
+                best_by_chunk[ev.chunk_id] = ev
+        all_evidence = sorted(best_by_chunk.values(), key=lambda ev: ev.score, reverse=True)
+        all_evidence = all_evidence[:max(1, config.TOP_K_RETRIEVAL * max_hops // 2)]
+
         # Final synthesis
         final_context = self._format_context(
             RetrievalResult(
@@ -364,18 +795,12 @@ Then, after your answer is complete, add:
 
         final_answer = self._generate_answer(question, final_context)
 
-        # Format evidence
-        evidence_list = [
-            self.retriever.format_evidence_for_display(ev)
-            for ev in all_evidence
-        ]
-
         sources = self._extract_sources(all_evidence)
 
         return Answer(
             question=question,
             answer=f"Multi-hop Reasoning ({len(reasoning_chain)} hops):\n\n{final_answer}",
-            evidence=evidence_list,
+            evidence_chunks=all_evidence,
             sources=sources,
             has_evidence=True,
             retrieval_stats={
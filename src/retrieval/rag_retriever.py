@@ -1,17 +1,117 @@
 """
 RAG retrieval layer with cross-paper synthesis and evidence linking.
 """
+import ast
+import asyncio
+import hashlib
+import itertools
+import json
 import logging
-from typing import List, Dict, Any, Optional
-from dataclasses import dataclass
-from collections import defaultdict
+import threading
+import time
+from functools import lru_cache, partial
+from typing import List, Dict, Any, Optional, Tuple, Hashable
+from dataclasses import dataclass, replace
+from collections import OrderedDict, defaultdict
 
-from .vector_store import VectorStore
+import numpy as np
+
+from .vector_store import BBOX_FIELDS, VectorStore
 from ..config import config
 
 logger = logging.getLogger(__name__)
 
 
+@lru_cache(maxsize=4096)
+def _parse_bbox_cached(raw: str) -> Tuple[float, ...]:
+    try:
+        return tuple(json.loads(raw))
+    except ValueError:
+        # Indexes built before bboxes were stored as JSON hold str(list)
+        return tuple(ast.literal_eval(raw))
+
+
+def parse_bbox(raw: Any) -> List[float]:
+    """
+    Decode a bbox from chunk metadata.
+
+    Args:
+        raw: JSON-encoded bbox string, or an already decoded list
+
+    Returns:
+        Bounding box [x1, y1, x2, y2]
+    """
+    if not isinstance(raw, str):
+        return list(raw)
+    # Regions come back in many retrievals, so decoded strings are cached
+    return list(_parse_bbox_cached(raw))
+
+
+@lru_cache(maxsize=1)
+def _get_encoding():
+    """
+    Tokenizer for the configured LLM, or None if tiktoken is unavailable.
+
+    OpenRouter model names carry a provider prefix (openai/gpt-4...);
+    models tiktoken does not know fall back to cl100k_base. The BPE file
+    is downloaded on first use, so offline hosts also get None.
+    """
+    try:
+        import tiktoken
+    except ImportError:
+        logger.warning("tiktoken not installed, estimating tokens from characters")
+        return None
+    try:
+        try:
+            return tiktoken.encoding_for_model(config.LLM_MODEL.split('/')[-1])
+        except KeyError:
+            return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        logger.warning(f"tiktoken encoding unavailable, estimating tokens from characters: {e}")
+        return None
+
+
+def _truncation_limit(lengths: List[int], budget: int) -> Optional[int]:
+    """
+    Common per-passage length cap that makes the passages fit a budget.
+
+    Finds the largest L with sum(min(length, L)) <= budget, so short
+    passages stay whole and only the longest ones are cut.
+
+    Args:
+        lengths: Passage lengths
+        budget: Total length available
+
+    Returns:
+        The cap, or None if everything already fits
+    """
+    if sum(lengths) <= budget:
+        return None
+    remaining = len(lengths)
+    for length in sorted(lengths):
+        if length * remaining > budget:
+            return budget // remaining
+        budget -= length
+        remaining -= 1
+    return None
+
+
+def bbox_from_metadata(metadata: Dict[str, Any]) -> List[float]:
+    """
+    Read a chunk's bbox from its vector store metadata.
+
+    Args:
+        metadata: Chunk metadata
+
+    Returns:
+        Bounding box [x1, y1, x2, y2]
+    """
+    if BBOX_FIELDS[0] in metadata:
+        return [metadata[field] for field in BBOX_FIELDS]
+    # Indexes built before bboxes were stored as separate fields
+    return parse_bbox(metadata['bbox'])
+
+
 @dataclass
 class Evidence:
     """Container for evidence with source information."""
@@ -36,6 +136,154 @@ class RetrievalResult:
     by_region_type: Dict[str, List[Evidence]]
 
 
+class SemanticRetrievalCache:
+    """
+    In-memory cache of retrieval results keyed by query embedding.
+
+    Near-duplicate queries (rephrasings, regenerations) hash to the same
+    random-projection LSH bucket in at least one of several tables; a
+    cached result is reused when its query is within a cosine threshold,
+    skipping the vector search.
+
+    Entries are not invalidated when the index changes, so results can be
+    up to ttl_seconds stale after re-indexing.
+    """
+
+    def __init__(
+        self,
+        num_tables: int = 4,
+        bits_per_table: int = 16,
+        max_entries: int = 256,
+        ttl_seconds: float = 600,
+        threshold: float = 0.95,
+        seed: int = 0
+    ):
+        """
+        Initialize cache.
+
+        Args:
+            num_tables: Independent hash tables; more tables find more
+                near-duplicates
+            bits_per_table: Hyperplanes per table; more bits make buckets
+                narrower
+            max_entries: Results kept; the least recently used go first
+            ttl_seconds: Age after which a result is retrieved again
+            threshold: Minimum cosine similarity between queries for a hit
+            seed: Seed for the random hyperplanes
+        """
+        self.num_tables = num_tables
+        self.bits_per_table = bits_per_table
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.threshold = threshold
+        self._rng = np.random.default_rng(seed)
+        # Drawn on first use, once the embedding dimension is known
+        self._planes: Optional[np.ndarray] = None
+        # entry id -> (stored at, unit query vector, bucket keys, result)
+        self._entries: "OrderedDict[int, Tuple[float, np.ndarray, List[Hashable], RetrievalResult]]" = OrderedDict()
+        self._buckets: Dict[Hashable, List[int]] = defaultdict(list)
+        self._ids = itertools.count()
+        # Streamlit sessions share one retriever across threads
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+
+    def _bucket_keys(self, unit: np.ndarray, scope: Hashable) -> List[Hashable]:
+        if self._planes is None:
+            self._planes = self._rng.standard_normal(
+                (self.num_tables * self.bits_per_table, unit.shape[0])
+            ).astype(np.float32)
+        bits = (self._planes @ unit > 0).reshape(self.num_tables, self.bits_per_table)
+        packed = np.packbits(bits, axis=1)
+        return [(table, scope, row.tobytes()) for table, row in enumerate(packed)]
+
+    @staticmethod
+    def _unit(query_embedding: np.ndarray) -> np.ndarray:
+        vec = np.asarray(query_embedding, dtype=np.float32).ravel()
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm > 0 else vec
+
+    def get(self, query_embedding: np.ndarray, scope: Hashable = None) -> Optional[RetrievalResult]:
+        """
+        Look up a result for a similar query.
+
+        Args:
+            query_embedding: Embedding of the new query
+            scope: Retrieval parameters that must match exactly (filters,
+                top_k, ...)
+
+        Returns:
+            Cached result of the most similar query, or None on a miss
+        """
+        unit = self._unit(query_embedding)
+        now = time.monotonic()
+        with self._lock:
+            candidates = {
+                entry_id
+                for key in self._bucket_keys(unit, scope)
+                for entry_id in self._buckets.get(key, ())
+            }
+            best_id, best_sim = None, self.threshold
+            for entry_id in candidates:
+                stored_at, vec, _, _ = self._entries[entry_id]
+                if now - stored_at >= self.ttl_seconds:
+                    self._remove(entry_id)
+                    continue
+                sim = float(vec @ unit)
+                if sim >= best_sim:
+                    best_id, best_sim = entry_id, sim
+            if best_id is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(best_id)
+            self.hits += 1
+            return self._entries[best_id][3]
+
+    def set(self, query_embedding: np.ndarray, result: RetrievalResult, scope: Hashable = None):
+        """
+        Store a retrieval result.
+
+        Args:
+            query_embedding: Embedding of the query
+            result: Result retrieved for it
+            scope: Retrieval parameters the result was produced with
+        """
+        unit = self._unit(query_embedding)
+        with self._lock:
+            keys = self._bucket_keys(unit, scope)
+            entry_id = next(self._ids)
+            self._entries[entry_id] = (time.monotonic(), unit, keys, result)
+            for key in keys:
+                self._buckets[key].append(entry_id)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, entry_id: int):
+        _, _, keys, _ = self._entries.pop(entry_id)
+        for key in keys:
+            bucket = self._buckets[key]
+            bucket.remove(entry_id)
+            if not bucket:
+                del self._buckets[key]
+
+    def clear(self):
+        """Drop all cached results, e.g. after re-indexing."""
+        with self._lock:
+            self._entries.clear()
+            self._buckets.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get cache statistics."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
+
+
 class RAGRetriever:
     """
     RAG retrieval layer with advanced features:
@@ -53,6 +301,14 @@ class RAGRetriever:
             vector_store: Initialized vector store
         """
         self.vector_store = vector_store
+
+        # Results for near-duplicate queries with the same parameters
+        self.cache = SemanticRetrievalCache(
+            max_entries=config.RETRIEVAL_CACHE_MAX_ENTRIES,
+            ttl_seconds=config.RETRIEVAL_CACHE_TTL,
+            threshold=config.RETRIEVAL_CACHE_THRESHOLD
+        ) if config.RETRIEVAL_CACHE_TTL > 0 else None
+
         logger.info("RAG retriever initialized")
 
     def retrieve(
@@ -80,6 +336,22 @@ class RAGRetriever:
 
         logger.info(f"Retrieving for query: {query[:100]}...")
 
+        # Embed once: the embedding keys the cache and drives the search
+        query_embedding = None
+        scope = None
+        if self.cache is not None:
+            query_embedding = self.vector_store.embed_query(query)
+            scope = (
+                tuple(filter_papers or ()),
+                tuple(filter_region_types or ()),
+                top_k,
+                diversity_lambda
+            )
+            cached = self.cache.get(query_embedding, scope)
+            if cached is not None:
+                logger.info("Reusing retrieval result of a similar query")
+                return replace(cached, query=query)
+
         # Build filter metadata
         filter_metadata = None
         if filter_papers and len(filter_papers) == 1:
@@ -93,25 +365,35 @@ class RAGRetriever:
             results = self.vector_store.search_by_paper(
                 query=query,
                 paper_names=filter_papers,
-                top_k=top_k
+                top_k=top_k,
+                query_embedding=query_embedding
             )
         elif filter_region_types and len(filter_region_types) > 1:
             # Multi-region-type search
             results = self.vector_store.search_by_region_type(
                 query=query,
                 region_types=filter_region_types,
-                top_k=top_k
+                top_k=top_k,
+                query_embedding=query_embedding
             )
         else:
             # General search
             results = self.vector_store.search(
                 query=query,
                 top_k=top_k * 2,  # Get more for diversity sampling
-                filter_metadata=filter_metadata
+                filter_metadata=filter_metadata,
+                query_embedding=query_embedding
             )
 
-        # Apply diversity sampling if needed
-        if diversity_lambda > 0 and len(results) > top_k:
+        results = self._dedup_results(results)
+
+        # Apply diversity sampling if needed; it buys nothing when every
+        # candidate comes from the same paper
+        single_paper = (
+            (filter_papers and len(filter_papers) == 1)
+            or len({r['metadata']['paper_name'] for r in results}) <= 1
+        )
+        if diversity_lambda > 0 and len(results) > top_k and not single_paper:
             results = self._diversify_results(results, top_k, diversity_lambda)
         else:
             results = results[:top_k]
@@ -126,7 +408,7 @@ class RAGRetriever:
                 page_num=metadata['page_num'],
                 region_type=metadata['region_type'],
                 region_id=metadata['region_id'],
-                bbox=eval(metadata['bbox']),  # Convert string back to list
+                bbox=bbox_from_metadata(metadata),
                 score=result['score'],
                 chunk_id=result['chunk_id']
             )
@@ -152,8 +434,57 @@ class RAGRetriever:
             f"Retrieved {len(evidence_chunks)} chunks from {len(papers_searched)} papers"
         )
 
+        if self.cache is not None:
+            self.cache.set(query_embedding, retrieval_result, scope)
+
         return retrieval_result
 
+    async def aretrieve(self, query: str, **kwargs) -> RetrievalResult:
+        """
+        Async variant of retrieve.
+
+        Embedding and vector search are CPU/disk-bound library calls, so
+        they run in a worker thread instead of blocking the event loop.
+
+        Args:
+            query: User query
+            **kwargs: Additional arguments for retrieve
+
+        Returns:
+            RetrievalResult with organized evidence
+        """
+        return await asyncio.to_thread(self.retrieve, query, **kwargs)
+
+    @staticmethod
+    def _dedup_results(results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Drop repeated candidates, keeping the first (best scored) of each.
+
+        A candidate repeats an earlier one if it has the same chunk_id, or
+        the same leading text (a chunk indexed twice under different ids).
+
+        Args:
+            results: Search results, best first
+
+        Returns:
+            Results without duplicates
+        """
+        seen_ids = set()
+        seen_texts = set()
+        unique = []
+        for result in results:
+            text_digest = hashlib.blake2b(
+                result['text'][:512].encode('utf-8'), digest_size=8
+            ).digest()
+            if result['chunk_id'] in seen_ids or text_digest in seen_texts:
+                continue
+            seen_ids.add(result['chunk_id'])
+            seen_texts.add(text_digest)
+            unique.append(result)
+        if len(unique) < len(results):
+            logger.debug(f"Dropped {len(results) - len(unique)} duplicate candidates")
+        return unique
+
     def _diversify_results(
         self,
         results: List[Dict[str, Any]],
@@ -174,77 +505,79 @@ class RAGRetriever:
         if len(results) <= top_k:
             return results
 
-        selected = [results[0]]  # Start with most relevant
-        remaining = results[1:]
-
-        while len(selected) < top_k and remaining:
-            mmr_scores = []
-
-            for candidate in remaining:
-                # Relevance score
-                relevance = candidate['score']
-
-                # Diversity: minimum similarity to selected documents
-                max_sim = max(
-                    self._calculate_similarity(candidate, selected_doc)
-                    for selected_doc in selected
-                )
-
-                # MMR score
-                mmr = diversity_lambda * relevance - (1 - diversity_lambda) * max_sim
-                mmr_scores.append((mmr, candidate))
-
-            # Select best MMR score
-            mmr_scores.sort(key=lambda x: x[0], reverse=True)
-            best_candidate = mmr_scores[0][1]
-
-            selected.append(best_candidate)
-            remaining.remove(best_candidate)
-
-        return selected
-
-    def _calculate_similarity(
-        self,
-        doc1: Dict[str, Any],
-        doc2: Dict[str, Any]
-    ) -> float:
-        """
-        Calculate similarity between two documents.
+        # Pairwise similarity, from the same heuristic as before: same
+        # region 0.9, same paper 0.6, otherwise 0.3
+        _, paper_ids = np.unique(
+            [r['metadata']['paper_name'] for r in results], return_inverse=True
+        )
+        _, region_ids = np.unique(
+            [r['metadata']['region_id'] for r in results], return_inverse=True
+        )
+        sim = np.where(
+            region_ids[:, None] == region_ids[None, :],
+            0.9,
+            np.where(paper_ids[:, None] == paper_ids[None, :], 0.6, 0.3)
+        )
+        relevance = np.array([r['score'] for r in results], dtype=np.float64)
 
-        Simple heuristic based on paper name and region overlap.
-        """
-        # Same paper: higher similarity
-        same_paper = doc1['metadata']['paper_name'] == doc2['metadata']['paper_name']
+        # Start with the most relevant; max_sim tracks each candidate's
+        # highest similarity to anything selected so far
+        selected = [0]
+        max_sim = sim[0].copy()
+        available = np.ones(len(results), dtype=bool)
+        available[0] = False
 
-        # Same region: very high similarity
-        same_region = doc1['metadata']['region_id'] == doc2['metadata']['region_id']
+        while len(selected) < top_k:
+            mmr = diversity_lambda * relevance - (1 - diversity_lambda) * max_sim
+            mmr[~available] = -np.inf
+            best = int(np.argmax(mmr))
+            selected.append(best)
+            available[best] = False
+            np.maximum(max_sim, sim[best], out=max_sim)
 
-        if same_region:
-            return 0.9
-        elif same_paper:
-            return 0.6
-        else:
-            return 0.3
+        return [results[i] for i in selected]
 
     def _group_by_paper(
         self,
         evidence_chunks: List[Evidence]
     ) -> Dict[str, List[Evidence]]:
         """Group evidence by paper name."""
-        grouped = defaultdict(list)
-        for evidence in evidence_chunks:
-            grouped[evidence.paper_name].append(evidence)
-        return dict(grouped)
+        return self._group_by(evidence_chunks, [e.paper_name for e in evidence_chunks])
 
     def _group_by_region_type(
         self,
         evidence_chunks: List[Evidence]
     ) -> Dict[str, List[Evidence]]:
         """Group evidence by region type."""
-        grouped = defaultdict(list)
-        for evidence in evidence_chunks:
-            grouped[evidence.region_type].append(evidence)
-        return dict(grouped)
+        return self._group_by(evidence_chunks, [e.region_type for e in evidence_chunks])
+
+    @staticmethod
+    def _group_by(
+        evidence_chunks: List[Evidence],
+        keys: List[str]
+    ) -> Dict[str, List[Evidence]]:
+        """
+        Group evidence by a parallel list of keys.
+
+        Groups come out in sorted key order; within a group the evidence
+        keeps its retrieval (relevance) order.
+
+        Args:
+            evidence_chunks: Evidence to group
+            keys: Group key of each evidence chunk
+
+        Returns:
+            Mapping of key to its evidence
+        """
+        if not evidence_chunks:
+            return {}
+        labels, inverse = np.unique(keys, return_inverse=True)
+        order = np.argsort(inverse, kind='stable')
+        bounds = np.cumsum(np.bincount(inverse))[:-1]
+        return {
+            label: [evidence_chunks[i] for i in group]
+            for label, group in zip(labels.tolist(), np.split(order, bounds))
+        }
 
     def get_context_for_llm(
         self,
@@ -254,6 +587,10 @@ class RAGRetriever:
         """
         Format retrieval results as context for LLM.
 
+        Token counts come from the LLM's tokenizer (tiktoken). When the
+        passages do not fit, each is cut at its tail to a common length
+        chosen so the total fits, rather than dropping whole passages.
+
         Args:
             retrieval_result: Retrieval result
             max_tokens: Maximum tokens for context
@@ -261,44 +598,57 @@ class RAGRetriever:
         Returns:
             Formatted context string
         """
-        context_parts = []
-        context_parts.append(f"Query: {retrieval_result.query}\n")
-        context_parts.append(
+        encoding = _get_encoding()
+        if encoding is not None:
+            # Passages quoting special tokens (<|endoftext|>...) are plain text
+            encode = partial(encoding.encode, disallowed_special=())
+            decode, budget = encoding.decode, max_tokens
+        else:
+            # No tokenizer: work in characters at ~4 per token
+            encode, decode, budget = (lambda text: text), ''.join, max_tokens * 4
+
+        header = (
+            f"Query: {retrieval_result.query}\n"
             f"Retrieved {retrieval_result.total_chunks} relevant passages "
             f"from {len(retrieval_result.papers_searched)} papers.\n\n"
         )
+        labels = [
+            f"[Evidence {i}]\n"
+            f"Source: {evidence.paper_name}, Page {evidence.page_num}\n"
+            f"Type: {evidence.region_type}\n"
+            f"Relevance: {evidence.score:.3f}\n"
+            f"Content:\n"
+            for i, evidence in enumerate(retrieval_result.evidence_chunks, 1)
+        ]
+        bodies = [encode(evidence.text) for evidence in retrieval_result.evidence_chunks]
+
+        unit = 'tokens' if encoding is not None else 'characters'
+        note = f"[Note: Passages truncated to {{}} {unit} each due to context limit]\n"
+
+        # Labels, separators and the note are always kept; passages share
+        # what is left
+        budget -= (
+            len(encode(header))
+            + sum(len(encode(label)) for label in labels)
+            + len(encode("\n\n")) * len(labels)
+        )
+        limit = _truncation_limit([len(body) for body in bodies], max(budget, 0))
+        if limit is not None:
+            budget -= len(encode(note.format(limit)))
+            limit = _truncation_limit([len(body) for body in bodies], max(budget, 0))
 
-        # Estimate tokens (rough: 4 chars per token)
-        current_tokens = len(''.join(context_parts)) // 4
-
-        for i, evidence in enumerate(retrieval_result.evidence_chunks, 1):
-            # Format evidence
-            evidence_text = (
-                f"[Evidence {i}]\n"
-                f"Source: {evidence.paper_name}, Page {evidence.page_num}\n"
-                f"Type: {evidence.region_type}\n"
-                f"Relevance: {evidence.score:.3f}\n"
-                f"Content:\n{evidence.text}\n\n"
-            )
-
-            evidence_tokens = len(evidence_text) // 4
-
-            if current_tokens + evidence_tokens > max_tokens:
-                context_parts.append(
-                    f"\n[Note: Showing {i-1} of {retrieval_result.total_chunks} "
-                    "retrieved passages due to context limit]\n"
-                )
-                break
+        parts = [header]
+        for label, body in zip(labels, bodies):
+            text = decode(body[:limit]) if limit is not None else decode(body)
+            parts.append(f"{label}{text}\n\n")
 
-            context_parts.append(evidence_text)
-            current_tokens += evidence_tokens
+        if limit is not None:
+            parts.append(note.format(limit))
 
-        return ''.join(context_parts)
+        return ''.join(parts)
 
-    def format_evidence_for_display(
-        self,
-        evidence: Evidence
-    ) -> Dict[str, Any]:
+    @staticmethod
+    def format_evidence_for_display(evidence: Evidence) -> Dict[str, Any]:
         """
         Format evidence for display in UI.
 
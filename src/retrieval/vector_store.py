@@ -2,8 +2,12 @@
 ChromaDB vector store for semantic search and retrieval.
 """
 import logging
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from typing import List, Dict, Any, Optional
 from pathlib import Path
+import numpy as np
 import chromadb
 from chromadb.config import Settings
 from sentence_transformers import SentenceTransformer
@@ -12,6 +16,70 @@ from ..config import config
 
 logger = logging.getLogger(__name__)
 
+# Distinct recent queries whose embeddings are kept
+_QUERY_CACHE_SIZE = 1024
+
+# Metadata fields holding a chunk's bbox (x1, y1, x2, y2); Chroma metadata
+# must be flat, and floats are stored natively
+BBOX_FIELDS = ('bbox_x0', 'bbox_y0', 'bbox_x1', 'bbox_y1')
+
+# Chunks embedded and inserted per step of add_chunks
+_ADD_BATCH_SIZE = 4096
+
+# HNSW index parameters for new collections: denser graph and wider
+# construction beam than Chroma's defaults (M=16, construction_ef=100,
+# search_ef=10) for better recall; M and construction_ef are fixed once a
+# collection exists
+_COLLECTION_METADATA = {
+    "hnsw:space": "cosine",
+    "hnsw:M": 24,
+    "hnsw:construction_ef": 128,
+    "hnsw:search_ef": 100
+}
+
+
+def _search_ef_for(vector_count: int) -> int:
+    """HNSW search beam width for a collection size."""
+    if vector_count < 100_000:
+        return 40
+    if vector_count < 1_000_000:
+        return 100
+    return 200
+
+
+def _chunk_metadata(chunk: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Build the flat ChromaDB metadata for a chunk.
+
+    Keys are spelled out (matching BBOX_FIELDS) so each chunk costs a single
+    dict literal; this runs once per chunk on every ingest.
+
+    Args:
+        chunk: Chunk dictionary
+
+    Returns:
+        Metadata dictionary
+    """
+    x0, y0, x1, y1 = chunk['bbox']
+    metadata = {
+        'paper_name': chunk['paper_name'],
+        'page_num': chunk['page_num'],
+        'region_id': chunk['region_id'],
+        'region_type': chunk['region_type'],
+        'reading_order': chunk['reading_order'],
+        'chunk_index': chunk['chunk_index'],
+        'bbox_x0': float(x0),
+        'bbox_y0': float(y0),
+        'bbox_x1': float(x1),
+        'bbox_y1': float(y1)
+    }
+
+    section = chunk.get('section')
+    if section:
+        metadata['section'] = section
+
+    return metadata
+
 
 class VectorStore:
     """
@@ -45,6 +113,19 @@ class VectorStore:
         # Initialize embedding model
         logger.info(f"Loading embedding model: {self.embedding_model_name}")
         self.embedding_model = SentenceTransformer(self.embedding_model_name)
+        if config.EMBEDDING_MAX_SEQ_LENGTH:
+            self.embedding_model.max_seq_length = config.EMBEDDING_MAX_SEQ_LENGTH
+        if not getattr(self.embedding_model.tokenizer, 'is_fast', True):
+            logger.warning("Embedding model has no fast (Rust) tokenizer; tokenization will be slow")
+        self._accelerate_embedding_model()
+
+        # One throwaway forward pass, so lazy start-up work (CUDA context,
+        # kernel selection, compilation) is not paid by the first query
+        self.embedding_model.encode(["warm-up"] * 2, batch_size=2)
+
+        # Repeated queries (reruns, multi-hop, suggested questions) skip
+        # the transformer forward pass
+        self._embed_normalized = lru_cache(maxsize=_QUERY_CACHE_SIZE)(self._encode_query)
 
         # Initialize ChromaDB client
         self.client = chromadb.PersistentClient(
@@ -55,15 +136,48 @@ class VectorStore:
         # Get or create collection
         self.collection = self.client.get_or_create_collection(
             name=self.collection_name,
-            metadata={"hnsw:space": "cosine"}
+            metadata=_COLLECTION_METADATA
         )
+        # search_ef currently applied; set on first search for the size
+        self._search_ef: Optional[int] = None
+
+        # Chunks per paper and per region type, read once here and then
+        # kept up to date by add_chunks, delete_paper and clear
+        self._paper_counts: Counter = Counter()
+        self._region_counts: Counter = Counter()
+        self._count_chunks(self.collection.get(include=["metadatas"])['metadatas'] or [], 1)
 
         logger.info(f"Vector store initialized: {self.collection_name}")
         logger.info(f"Current collection size: {self.collection.count()}")
 
+    def _accelerate_embedding_model(self):
+        """
+        Use FP16 and optionally torch.compile for the encoder on CUDA.
+
+        Encoding is compute-bound in the transformer, where half precision
+        uses tensor cores and halves activation memory. CPU-only setups,
+        or any failure here, keep the FP32 eager model.
+        """
+        try:
+            import torch
+
+            if not torch.cuda.is_available() or self.embedding_model.device.type != 'cuda':
+                return
+
+            if config.EMBEDDING_FP16:
+                self.embedding_model.half()
+                logger.info("Embedding model running in FP16")
+
+            if config.EMBEDDING_COMPILE:
+                transformer = self.embedding_model[0]
+                transformer.auto_model = torch.compile(transformer.auto_model, dynamic=True)
+                logger.info("Embedding model compiled")
+        except Exception as e:
+            logger.warning(f"Embedding model acceleration unavailable, using defaults: {e}")
+
     def add_chunks(self, chunks: List[Dict[str, Any]]):
         """
-        Add chunks to the vector store.
+        Add chunks to the vector store, replacing chunks with the same ids.
 
         Args:
             chunks: List of chunk dictionaries with text and metadata
@@ -75,54 +189,164 @@ class VectorStore:
         logger.info(f"Adding {len(chunks)} chunks to vector store")
 
         # Prepare data for ChromaDB
-        ids = []
-        texts = []
-        metadatas = []
-
-        for chunk in chunks:
-            ids.append(chunk['chunk_id'])
-            texts.append(chunk['text'])
-
-            # Prepare metadata (ChromaDB requires flat dictionary)
-            metadata = {
-                'paper_name': chunk['paper_name'],
-                'page_num': chunk['page_num'],
-                'region_id': chunk['region_id'],
-                'region_type': chunk['region_type'],
-                'reading_order': chunk['reading_order'],
-                'chunk_index': chunk['chunk_index'],
-                'bbox': str(chunk['bbox'])  # Store as string
-            }
-
-            if chunk.get('section'):
-                metadata['section'] = chunk['section']
-
-            metadatas.append(metadata)
-
-        # Generate embeddings
+        ids = [chunk['chunk_id'] for chunk in chunks]
+        texts = [chunk['text'] for chunk in chunks]
+        metadatas = list(map(_chunk_metadata, chunks))
+
+        # Embed and insert in batches: a background thread inserts batch k
+        # while batch k+1 is embedded, and embeddings go to ChromaDB as
+        # arrays, never as nested Python lists. They stay full precision:
+        # Chroma's HNSW index stores float32 vectors whatever it is given,
+        # so quantizing here (int8/fp16) would lose recall without saving
+        # any index memory.
         logger.info("Generating embeddings...")
-        embeddings = self.embedding_model.encode(
-            texts,
-            show_progress_bar=True,
-            convert_to_numpy=True
-        ).tolist()
+        pool = None
+        min_pool = config.EMBEDDING_MULTI_PROCESS_MIN
+        if min_pool and len(texts) >= min_pool:
+            logger.info("Embedding with a multi-process pool...")
+            pool = self.embedding_model.start_multi_process_pool()
+        try:
+            with ThreadPoolExecutor(max_workers=1) as inserter:
+                pending = None
+                for start in range(0, len(texts), _ADD_BATCH_SIZE):
+                    stop = start + _ADD_BATCH_SIZE
+                    embeddings = self._encode_texts(texts[start:stop], pool)
+                    if pending is not None:
+                        pending.result()
+                    pending = inserter.submit(
+                        self._insert_batch,
+                        ids=ids[start:stop],
+                        documents=texts[start:stop],
+                        embeddings=embeddings,
+                        metadatas=metadatas[start:stop]
+                    )
+                pending.result()
+        finally:
+            if pool is not None:
+                self.embedding_model.stop_multi_process_pool(pool)
 
-        # Add to ChromaDB
-        self.collection.add(
+        logger.info(f"Successfully added {len(chunks)} chunks")
+        total = self.collection.count()
+        logger.info(f"Total collection size: {total}")
+        self.auto_configure_hnsw(total)
+
+    def _insert_batch(
+        self,
+        ids: List[str],
+        documents: List[str],
+        embeddings: np.ndarray,
+        metadatas: List[Dict[str, Any]]
+    ):
+        """
+        Upsert one batch into the collection and update the cached counts.
+
+        Re-ingesting a document replaces its chunks in place instead of
+        failing or silently keeping the old versions.
+        """
+        replaced = self.collection.get(ids=ids, include=["metadatas"])['metadatas']
+        self.collection.upsert(
             ids=ids,
-            documents=texts,
+            documents=documents,
             embeddings=embeddings,
             metadatas=metadatas
         )
+        self._count_chunks(replaced or [], -1)
+        self._count_chunks(metadatas, 1)
+
+    def _count_chunks(self, metadatas: List[Dict[str, Any]], sign: int):
+        """Add (sign=1) or remove (sign=-1) chunks from the cached counts."""
+        for metadata in metadatas:
+            self._paper_counts[metadata['paper_name']] += sign
+            self._region_counts[metadata['region_type']] += sign
+        # Drop papers and region types with no chunks left
+        self._paper_counts = +self._paper_counts
+        self._region_counts = +self._region_counts
+
+    def auto_configure_hnsw(self, vector_count: Optional[int] = None):
+        """
+        Match the HNSW search beam width (search_ef) to the collection size.
 
-        logger.info(f"Successfully added {len(chunks)} chunks")
-        logger.info(f"Total collection size: {self.collection.count()}")
+        Larger collections need a wider beam for the same recall; small
+        ones answer faster with a narrower one. Only issues a change when
+        the size tier changes.
+
+        Args:
+            vector_count: Collection size (counted if not given)
+        """
+        if vector_count is None:
+            vector_count = self.collection.count()
+        search_ef = _search_ef_for(vector_count)
+        if search_ef == self._search_ef:
+            return
+        try:
+            self.collection.modify(configuration={"hnsw": {"ef_search": search_ef}})
+            logger.info(f"HNSW search_ef set to {search_ef} for {vector_count} vectors")
+        except Exception as e:
+            logger.warning(f"Could not set HNSW search_ef: {e}")
+        # Not retried on failure; the collection keeps its current value
+        self._search_ef = search_ef
+
+    def _encode_texts(self, texts: List[str], pool: Optional[Dict[str, Any]] = None) -> np.ndarray:
+        """
+        Embed chunk texts for indexing.
+
+        encode() already orders texts by length and restores the input
+        order, so each batch is padded only to its own longest text.
+
+        Args:
+            texts: Chunk texts
+            pool: Multi-process pool to shard the work over (large ingests)
+
+        Returns:
+            Unit-length embeddings, one row per text
+        """
+        if pool is not None:
+            embeddings = self.embedding_model.encode_multi_process(
+                texts,
+                pool,
+                batch_size=config.EMBEDDING_BATCH_SIZE,
+                chunk_size=1000
+            )
+            norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+            return embeddings / np.maximum(norms, 1e-12)
+
+        return self.embedding_model.encode(
+            texts,
+            batch_size=config.EMBEDDING_BATCH_SIZE,
+            show_progress_bar=True,
+            convert_to_numpy=True,
+            normalize_embeddings=True
+        )
+
+    def embed_query(self, query: str) -> np.ndarray:
+        """
+        Embed a search query.
+
+        Args:
+            query: Search query
+
+        Returns:
+            Unit-length query embedding (shared with the cache; read-only)
+        """
+        # Only whitespace is normalized: the text is embedded as cached, and
+        # case can matter to the model
+        return self._embed_normalized(" ".join(query.split()))
+
+    def _encode_query(self, query: str) -> np.ndarray:
+        embedding = self.embedding_model.encode(
+            query,
+            convert_to_numpy=True,
+            normalize_embeddings=True
+        )
+        embedding.flags.writeable = False
+        return embedding
 
     def search(
         self,
         query: str,
         top_k: int = None,
-        filter_metadata: Optional[Dict[str, Any]] = None
+        filter_metadata: Optional[Dict[str, Any]] = None,
+        query_embedding: Optional[np.ndarray] = None
     ) -> List[Dict[str, Any]]:
         """
         Search for relevant chunks.
@@ -131,6 +355,7 @@ class VectorStore:
             query: Search query
             top_k: Number of results to return
             filter_metadata: Optional metadata filters
+            query_embedding: Precomputed embedding of the query (see embed_query)
 
         Returns:
             List of relevant chunks with scores
@@ -139,15 +364,16 @@ class VectorStore:
 
         logger.debug(f"Searching for: {query[:100]}...")
 
+        if self._search_ef is None:
+            self.auto_configure_hnsw()
+
         # Generate query embedding
-        query_embedding = self.embedding_model.encode(
-            query,
-            convert_to_numpy=True
-        ).tolist()
+        if query_embedding is None:
+            query_embedding = self.embed_query(query)
 
         # Search ChromaDB
         results = self.collection.query(
-            query_embeddings=[query_embedding],
+            query_embeddings=np.asarray(query_embedding)[None, :],
             n_results=top_k,
             where=filter_metadata
         )
@@ -172,65 +398,59 @@ class VectorStore:
         self,
         query: str,
         paper_names: List[str],
-        top_k: int = None
+        top_k: int = None,
+        query_embedding: Optional[np.ndarray] = None
     ) -> List[Dict[str, Any]]:
         """
         Search within specific papers.
 
+        One query filtered to all the papers, rather than one per paper;
+        ChromaDB returns the results already ranked.
+
         Args:
             query: Search query
             paper_names: List of paper names to search within
-            top_k: Number of results per paper
+            top_k: Number of results
+            query_embedding: Precomputed embedding of the query
 
         Returns:
             List of relevant chunks
         """
-        results = []
-
-        for paper_name in paper_names:
-            paper_results = self.search(
-                query=query,
-                top_k=top_k,
-                filter_metadata={'paper_name': paper_name}
-            )
-            results.extend(paper_results)
-
-        # Sort by score
-        results.sort(key=lambda x: x['score'], reverse=True)
-
-        return results[:top_k] if top_k else results
+        return self.search(
+            query=query,
+            top_k=top_k,
+            filter_metadata={'paper_name': {'$in': list(paper_names)}},
+            query_embedding=query_embedding
+        )
 
     def search_by_region_type(
         self,
         query: str,
         region_types: List[str],
-        top_k: int = None
+        top_k: int = None,
+        query_embedding: Optional[np.ndarray] = None
     ) -> List[Dict[str, Any]]:
         """
         Search within specific region types (e.g., tables, figures).
 
+        One query filtered to all the region types, rather than one per
+        type; ChromaDB returns the results already ranked.
+
         Args:
             query: Search query
             region_types: List of region types to search
             top_k: Number of results
+            query_embedding: Precomputed embedding of the query
 
         Returns:
             List of relevant chunks
         """
-        results = []
-
-        for region_type in region_types:
-            type_results = self.search(
-                query=query,
-                top_k=top_k,
-                filter_metadata={'region_type': region_type}
-            )
-            results.extend(type_results)
-
-        # Sort by score
-        results.sort(key=lambda x: x['score'], reverse=True)
-
-        return results[:top_k] if top_k else results
+        return self.search(
+            query=query,
+            top_k=top_k,
+            filter_metadata={'region_type': {'$in': list(region_types)}},
+            query_embedding=query_embedding
+        )
 
     def get_all_papers(self) -> List[str]:
         """
@@ -239,16 +459,7 @@ class VectorStore:
         Returns:
             List of unique paper names
         """
-        # Get all documents
-        all_docs = self.collection.get()
-
-        # Extract unique paper names
-        paper_names = set()
-        if all_docs['metadatas']:
-            for metadata in all_docs['metadatas']:
-                paper_names.add(metadata['paper_name'])
-
-        return sorted(list(paper_names))
+        return sorted(self._paper_counts)
 
     def get_stats(self) -> Dict[str, Any]:
         """
@@ -257,33 +468,14 @@ class VectorStore:
         Returns:
             Dictionary with statistics
         """
-        all_docs = self.collection.get()
-
-        stats = {
+        return {
             'total_chunks': self.collection.count(),
-            'papers': [],
-            'region_type_counts': {}
-        }
-
-        if all_docs['metadatas']:
-            # Count by paper
-            paper_counts = {}
-            region_counts = {}
-
-            for metadata in all_docs['metadatas']:
-                paper_name = metadata['paper_name']
-                region_type = metadata['region_type']
-
-                paper_counts[paper_name] = paper_counts.get(paper_name, 0) + 1
-                region_counts[region_type] = region_counts.get(region_type, 0) + 1
-
-            stats['papers'] = [
+            'papers': [
                 {'name': name, 'chunks': count}
-                for name, count in sorted(paper_counts.items())
-            ]
-            stats['region_type_counts'] = region_counts
-
-        return stats
+                for name, count in sorted(self._paper_counts.items())
+            ],
+            'region_type_counts': dict(self._region_counts)
+        }
 
     def delete_paper(self, paper_name: str):
         """
@@ -292,22 +484,46 @@ class VectorStore:
         Args:
             paper_name: Name of the paper to delete
         """
-        # Get all chunk IDs for this paper
+        # Get all chunk IDs for this paper, with the metadata the cached
+        # counts need; documents are not fetched
         results = self.collection.get(
-            where={'paper_name': paper_name}
+            where={'paper_name': paper_name},
+            include=["metadatas"]
         )
 
         if results['ids']:
             self.collection.delete(ids=results['ids'])
+            self._count_chunks(results['metadatas'], -1)
             logger.info(f"Deleted {len(results['ids'])} chunks from {paper_name}")
         else:
             logger.warning(f"No chunks found for paper: {paper_name}")
 
     def clear(self):
-        """Clear all data from the collection."""
-        self.client.delete_collection(name=self.collection_name)
-        self.collection = self.client.create_collection(
-            name=self.collection_name,
-            metadata={"hnsw:space": "cosine"}
-        )
+        """
+        Clear all data from the collection.
+
+        Deletes the chunks rather than dropping and recreating the
+        collection, so its handle, HNSW settings and open index files stay
+        in place for the re-index that usually follows.
+        """
+        ids = self.collection.get(include=[])['ids']
+        for start in range(0, len(ids), _ADD_BATCH_SIZE):
+            self.collection.delete(ids=ids[start:start + _ADD_BATCH_SIZE])
+        self._search_ef = None
+        self._paper_counts.clear()
+        self._region_counts.clear()
         logger.info("Cleared vector store")
+
+
+@lru_cache(maxsize=1)
+def get_default_store() -> VectorStore:
+    """
+    Process-wide vector store with the default configuration.
+
+    Loading the embedding model takes seconds, so callers that only need
+    the default store share this one instance.
+
+    Returns:
+        Initialized vector store
+    """
+    return VectorStore()